@@ -83,6 +83,8 @@ INSTALLED_APPS = list(set([
     "wagtail_color_panel",
     "wagtail_newsletter",
     "wagtailcache",
+    "django_tasks",
+    "django_tasks.backends.database",
     # Required allauth apps
     "allauth",
     "allauth.account",
@@ -90,7 +92,8 @@ INSTALLED_APPS = list(set([
 ] + CAST_APPS))
 
 MIDDLEWARE = [
-    'wagtailcache.cache.UpdateCacheMiddleware',
+    'home.middleware.CacheTagMiddleware',
+    'home.middleware.StaleWhileRevalidateUpdateMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -102,7 +105,10 @@ MIDDLEWARE = [
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
 ] + CAST_MIDDLEWARE
 
-MIDDLEWARE = MIDDLEWARE + ['wagtailcache.cache.FetchFromCacheMiddleware']
+MIDDLEWARE = MIDDLEWARE + [
+    'home.middleware.ProgramSnapshotMiddleware',
+    'home.middleware.StaleWhileRevalidateFetchMiddleware',
+]
 
 ROOT_URLCONF = "gotham_stem.urls"
 
@@ -135,11 +141,30 @@ AUTHENTICATION_BACKENDS = [
 
 
 CACHES = {
+    # Per-process LRU in front of "shared"; see home.cache_backends.TieredCache.
     "default": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "BACKEND": "home.cache_backends.TieredCache",
+        "LOCATION": "shared",
+        "OPTIONS": {
+            "L1_MAX_ENTRIES": 500,
+            "L1_TIMEOUT": 30,  # seconds
+            "SYNC_INTERVAL": 1,  # seconds between checks for other processes' writes
+        },
+    },
+    "shared": {
+        "BACKEND": "home.cache_backends.ShardedFileCache",
         "LOCATION": os.path.join(BASE_DIR, "cache"),
         "TIMEOUT": 3600, # 1 hour
-    }
+        "OPTIONS": {
+            "CULL_INTERVAL": 300,  # seconds between background expiry passes
+            # Cached pages with their stamps and headers, cards, fragments and
+            # rendition markers; the least recently written go above this.
+            "MAX_ENTRIES": 50000,
+            # Versions, tag versions and freshness records only go when they
+            # expire: losing them would turn every check against them into a miss.
+            "KEEP_NAMESPACES": ["version", "cache_tag", "swr_fresh"],
+        },
+    },
 }
 
 WSGI_APPLICATION = "gotham_stem.wsgi.application"
@@ -273,6 +298,46 @@ WAGTAILSEARCH_BACKENDS = {
     }
 }
 
+# "postgres" ranks program searches against the weighted tsvector on
+# ProgramSearchDocument, "wagtail" uses WAGTAILSEARCH_BACKENDS instead.
+PROGRAM_SEARCH_MODE = "postgres"
+
+# Opt-in: render Program pages to static HTML on publish and serve anonymous
+# visitors from those files (home.snapshots). Rebuild them all with
+#   python manage.py rebuild_program_snapshots
+PROGRAM_SNAPSHOTS = False
+PROGRAM_SNAPSHOT_ROOT = os.path.join(BASE_DIR, "snapshots")
+
+# Re-render a published page and its parent index into the page cache
+# (home.tasks.warm_pages); after a deploy run  python manage.py warm_cache
+WARM_CACHE_ON_PUBLISH = True
+
+# (soft, hard) seconds per page type: past the soft TTL the cached page is
+# still served, up to the hard TTL, while one background request re-renders
+# it (home.middleware.StaleWhileRevalidateFetchMiddleware). Other page types
+# expire after the cache's TIMEOUT as before; a "default" entry covers them.
+STALE_WHILE_REVALIDATE_TTLS = {
+    'home.homepage': (300, 3600),
+    'home.program': (900, 86400),
+    'home.guidancepage': (900, 86400),
+}
+
+# Background tasks (django-tasks). Search indexing keeps running inline;
+# image renditions and cache warming are queued in the database and run by
+#   python manage.py db_worker --backend renditions
+#   python manage.py db_worker --backend warming
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.immediate.ImmediateBackend",
+    },
+    "renditions": {
+        "BACKEND": "django_tasks.backends.database.DatabaseBackend",
+    },
+    "warming": {
+        "BACKEND": "django_tasks.backends.database.DatabaseBackend",
+    },
+}
+
 
 # Base URL to use when referring to full URLs within the Wagtail admin backend -
 # e.g. in notification emails. Don't include '/admin' or a trailing slash
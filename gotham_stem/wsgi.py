@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "gotham_stem.settings.dev")
 
 application = get_wsgi_application()
+
+# Load the taxonomy vocabulary before this worker takes traffic.
+from home.vocabulary import warm_vocabulary  # noqa: E402
+
+warm_vocabulary()
@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils.text import slugify
+from home.vocabulary import invalidate_vocabulary
 
 class AbstractBaseFilterModel(models.Model):
     """
@@ -12,6 +13,12 @@ class AbstractBaseFilterModel(models.Model):
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
+        invalidate_vocabulary()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_vocabulary()
+        return result
 
     def __str__(self):
         return self.name
@@ -0,0 +1,613 @@
+"""
+Cache backends.
+
+ShardedFileCache is FileBasedCache without the per-write directory scan;
+see its docstring.
+
+TieredCache puts a small per-process LRU (tier 1) in front of another
+configured cache (tier 2, the shared one: file, database, Redis...), so hot
+keys such as the navigation and featured posts stop costing a file open and
+an unpickle on every read::
+
+    CACHES = {
+        "default": {
+            "BACKEND": "home.cache_backends.TieredCache",
+            "LOCATION": "shared",           # alias of the tier 2 cache
+            "OPTIONS": {"L1_MAX_ENTRIES": 500, "L1_TIMEOUT": 30, "SYNC_INTERVAL": 1},
+        },
+        "shared": {"BACKEND": "home.cache_backends.ShardedFileCache", ...},
+    }
+
+Writes go to tier 2 and bump a generation number stored there, recording
+which key changed under ``_tiered_written_<generation>``. The bump is tier
+2's ``incr``, which must be atomic (ShardedFileCache's, LocMemCache's and
+Redis' are) so that two writers never log under the same generation. At
+most every SYNC_INTERVAL seconds each process compares generations and
+drops exactly the keys written since its last look (or its whole tier 1
+when it fell too far behind). Writes made by the process itself apply to
+its own tier 1 immediately, and L1_TIMEOUT caps how long any tier 1 entry
+lives. A value read from tier 2 is also kept no longer than its tier 2
+entry has left, when tier 2 can tell (``get_with_expiry``).
+"""
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from hashlib import md5
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = '_tiered_generation'
+WRITTEN_KEY = '_tiered_written_{}'
+
+_MISSING = object()
+
+
+class _Tier1:
+    """
+    The process-wide part of a TieredCache: Django hands out one backend
+    instance per thread, they all share this.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (expires at, pickled value)
+        self.generation = None        # last tier 2 generation applied
+        self.synced_at = 0.0
+        self.counters = Counter()
+
+
+_tier1s = {}
+_tier1s_lock = threading.Lock()
+
+
+def _tier1_for(name):
+    with _tier1s_lock:
+        return _tier1s.setdefault(name, _Tier1())
+
+
+class TieredCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self.l1_max_entries = int(options.get('L1_MAX_ENTRIES', 500))
+        self.l1_timeout = float(options.get('L1_TIMEOUT', 30))
+        self.sync_interval = float(options.get('SYNC_INTERVAL', 1))
+        self.replay_limit = int(options.get('REPLAY_LIMIT', 200))
+        self._tier1 = _tier1_for(location)
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    # tier 1
+
+    def _l1_get(self, key):
+        tier1 = self._tier1
+        with tier1.lock:
+            entry = tier1.entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    tier1.entries.move_to_end(key)
+                    tier1.counters['l1_hits'] += 1
+                    return pickle.loads(entry[1])
+                del tier1.entries[key]
+            tier1.counters['l1_misses'] += 1
+        return _MISSING
+
+    def _l1_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        ttl = self.l1_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            ttl = min(ttl, timeout)
+        if ttl <= 0:
+            self._l1_discard(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        tier1 = self._tier1
+        with tier1.lock:
+            tier1.entries[key] = (time.monotonic() + ttl, pickled)
+            tier1.entries.move_to_end(key)
+            while len(tier1.entries) > self.l1_max_entries:
+                tier1.entries.popitem(last=False)
+
+    def _l1_discard(self, *keys):
+        tier1 = self._tier1
+        with tier1.lock:
+            for key in keys:
+                tier1.entries.pop(key, None)
+
+    def _sync(self):
+        """
+        Drop the tier 1 entries other processes have written since we last looked.
+        """
+        tier1 = self._tier1
+        now = time.monotonic()
+        if now - tier1.synced_at < self.sync_interval:
+            return
+        tier1.synced_at = now
+        generation = self.shared.get(GENERATION_KEY)
+        seen = tier1.generation
+        if generation == seen:
+            return
+        written = None
+        if generation is not None and seen is not None and 0 < generation - seen <= self.replay_limit:
+            log_keys = [WRITTEN_KEY.format(g) for g in range(seen + 1, generation + 1)]
+            logged = self.shared.get_many(log_keys)
+            if len(logged) == len(log_keys):
+                written = logged.values()
+        with tier1.lock:
+            if written is None:
+                tier1.entries.clear()
+                tier1.counters['l1_flushes'] += 1
+            else:
+                for key in written:
+                    tier1.entries.pop(key, None)
+            tier1.generation = generation
+
+    def _written(self, *keys):
+        """
+        Tell the other processes that ``keys`` changed.
+        """
+        for key in keys:
+            try:
+                generation = self.shared.incr(GENERATION_KEY)
+            except ValueError:
+                if self.shared.add(GENERATION_KEY, 1, None):
+                    generation = 1
+                else:
+                    generation = self.shared.incr(GENERATION_KEY)
+            self.shared.set(WRITTEN_KEY.format(generation), key, max(self.l1_timeout * 2, 60))
+            tier1 = self._tier1
+            with tier1.lock:
+                # Our own write, nothing to replay for it.
+                if tier1.generation == generation - 1:
+                    tier1.generation = generation
+
+    # tier 2
+
+    def _shared_get(self, key, version=None):
+        """
+        ``(value, seconds it has left or None)`` from tier 2.
+        """
+        get_with_expiry = getattr(self.shared, 'get_with_expiry', None)
+        if get_with_expiry is None:
+            return self.shared.get(key, _MISSING, version=version), None
+        value, expires_at = get_with_expiry(key, _MISSING, version=version)
+        return value, None if expires_at is None else expires_at - time.time()
+
+    def _shared_get_many(self, keys, version=None):
+        if getattr(self.shared, 'get_with_expiry', None) is None:
+            return {key: (value, None) for key, value in self.shared.get_many(keys, version=version).items()}
+        found = {}
+        for key in keys:
+            value, left = self._shared_get(key, version)
+            if value is not _MISSING:
+                found[key] = (value, left)
+        return found
+
+    # cache API
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        l1_key = self.make_and_validate_key(key, version)
+        value = self._l1_get(l1_key)
+        if value is not _MISSING:
+            return value
+        value, left = self._shared_get(key, version)
+        with self._tier1.lock:
+            self._tier1.counters['l2_misses' if value is _MISSING else 'l2_hits'] += 1
+        if value is _MISSING:
+            return default
+        self._l1_set(l1_key, value, left)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        found, missing = {}, []
+        for key in keys:
+            value = self._l1_get(self.make_and_validate_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self._shared_get_many(missing, version)
+            with self._tier1.lock:
+                self._tier1.counters['l2_hits'] += len(shared)
+                self._tier1.counters['l2_misses'] += len(missing) - len(shared)
+            for key, (value, left) in shared.items():
+                self._l1_set(self.make_and_validate_key(key, version), value, left)
+                found[key] = value
+        return found
+
+    def has_key(self, key, version=None):
+        self._sync()
+        if self._l1_get(self.make_and_validate_key(key, version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version)
+        self.shared.set(key, value, timeout, version=version)
+        self._written(l1_key)
+        self._l1_set(l1_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_and_validate_key(key, version)
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self._written(l1_key)
+        self._l1_set(l1_key, value, timeout)
+        return True
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        l1_keys = {key: self.make_and_validate_key(key, version) for key in data}
+        self._written(*l1_keys.values())
+        for key, value in data.items():
+            if key not in failed:
+                self._l1_set(l1_keys[key], value, timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        l1_key = self.make_and_validate_key(key, version)
+        self._l1_discard(l1_key)
+        deleted = self.shared.delete(key, version=version)
+        self._written(l1_key)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        l1_keys = [self.make_and_validate_key(key, version) for key in keys]
+        self._l1_discard(*l1_keys)
+        self.shared.delete_many(keys, version=version)
+        self._written(*l1_keys)
+
+    def incr(self, key, delta=1, version=None):
+        l1_key = self.make_and_validate_key(key, version)
+        self._l1_discard(l1_key)
+        value = self.shared.incr(key, delta, version=version)
+        self._written(l1_key)
+        return value
+
+    def clear(self):
+        # Wipes the generation too, which makes every process flush tier 1.
+        self.shared.clear()
+        tier1 = self._tier1
+        with tier1.lock:
+            tier1.entries.clear()
+            tier1.generation = None
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def stats(self):
+        """
+        Hit / miss counters per tier for this process.
+        """
+        tier1 = self._tier1
+        with tier1.lock:
+            return {**tier1.counters, 'l1_entries': len(tier1.entries)}
+
+
+TRASH_DIR = '_trash'
+STALE_TMP_AGE = 3600  # seconds before a temp file from a crashed write is removed
+LOCK_SUFFIX = '.lock'
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _makedirs(path):
+    # As FileBasedCache._createdir: intermediate directories get 0o700 too.
+    old_umask = os.umask(0o077)
+    try:
+        os.makedirs(path, 0o700, exist_ok=True)
+    finally:
+        os.umask(old_umask)
+
+
+class ShardedFileCache(FileBasedCache):
+    """
+    FileBasedCache with entries spread over hashed sub-directories::
+
+        <LOCATION>/ns-<hash of the namespace>/ab/cd/abcd....djcache
+
+    The namespace is the part of the key before the first ':' (e.g.
+    ``program_card``), so ``delete_prefix('program_card')`` is a single
+    directory rename. Writes go to a temp file in the target directory
+    and are renamed into place. Nothing is culled on the request path: a
+    background thread per process drops expired entries, trims the cache
+    back under MAX_ENTRIES and empties the trash every CULL_INTERVAL
+    seconds (0 disables the thread; call ``cull()`` yourself). Entries in
+    the KEEP_NAMESPACES (version counters and other small bookkeeping
+    that everything else is checked against) only go when they expire;
+    they neither count towards MAX_ENTRIES nor get trimmed.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self.cull_interval = float(options.get('CULL_INTERVAL', 300))
+        self.keep_namespaces = tuple(options.get('KEEP_NAMESPACES', ()))
+
+    @staticmethod
+    def namespace_of(key):
+        namespace, separator, _ = key.partition(':')
+        return namespace if separator else ''
+
+    def _namespace_dir(self, namespace):
+        return os.path.join(self._dir, 'ns-' + md5(namespace.encode(), usedforsecurity=False).hexdigest()[:16])
+
+    def _key_to_file(self, key, version=None):
+        digest = md5(self.make_and_validate_key(key, version=version).encode(), usedforsecurity=False).hexdigest()
+        return os.path.join(
+            self._namespace_dir(self.namespace_of(key)),
+            digest[:2],
+            digest[2:4],
+            digest + self.cache_suffix,
+        )
+
+    def _write_entry(self, f, expiry, value):
+        f.write(pickle.dumps(expiry, self.pickle_protocol))
+        f.write(zlib.compress(pickle.dumps(value, self.pickle_protocol)))
+
+    def _write_temp(self, fname, expiry, value):
+        """
+        Write the entry to a temp file next to ``fname``; returns its path.
+        """
+        directory = os.path.dirname(fname)
+        for attempt in range(2):
+            _makedirs(directory)
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            except FileNotFoundError:
+                # The namespace was moved to the trash in between; recreate it.
+                if attempt:
+                    raise
+                continue
+            break
+        try:
+            with open(fd, 'wb') as f:
+                self._write_entry(f, expiry, value)
+        except BaseException:
+            _remove(tmp_path)
+            raise
+        return tmp_path
+
+    def _read(self, fname):
+        """
+        ``(expiry, value)`` of the entry in ``fname``, or None if it is
+        missing or expired.
+        """
+        try:
+            with open(fname, 'rb') as f:
+                try:
+                    expiry = pickle.load(f)
+                except EOFError:
+                    return None
+                if expiry is not None and expiry < time.time():
+                    return None
+                return expiry, pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        fname = self._key_to_file(key, version)
+        self._start_culler()
+        tmp_path = self._write_temp(fname, self.get_backend_timeout(timeout), value)
+        try:
+            os.replace(tmp_path, fname)
+        except BaseException:
+            _remove(tmp_path)
+            raise
+
+    def get_with_expiry(self, key, default=None, version=None):
+        """
+        ``(value, expires at)``, the expiry as a Unix time or None for never;
+        ``(default, None)`` for a missing key.
+        """
+        entry = self._read(self._key_to_file(key, version))
+        if entry is None:
+            return default, None
+        expiry, value = entry
+        return value, expiry
+
+    @contextmanager
+    def _entry_lock(self, fname):
+        """
+        Exclusive lock on ``<entry>.lock``, held by add and incr while they
+        read and replace the entry.
+        """
+        _makedirs(os.path.dirname(fname))
+        with open(fname + LOCK_SUFFIX, 'ab') as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock_file)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        FileBasedCache's add is a has_key then a set, so two processes can
+        both win. Here the complete entry is hard-linked into place, which
+        like O_CREAT | O_EXCL fails when the file exists, without readers
+        ever seeing it half written. An expired entry in the way is
+        replaced under the entry lock, after checking it again.
+        """
+        fname = self._key_to_file(key, version)
+        self._start_culler()
+        tmp_path = self._write_temp(fname, self.get_backend_timeout(timeout), value)
+        try:
+            try:
+                os.link(tmp_path, fname)
+                return True
+            except FileExistsError:
+                pass
+            with self._entry_lock(fname):
+                if self._read(fname) is not None:
+                    return False
+                os.replace(tmp_path, fname)
+                return True
+        finally:
+            _remove(tmp_path)
+
+    def incr(self, key, delta=1, version=None):
+        """
+        FileBasedCache's incr is a get then a set, so two processes can
+        return the same number. Here the read-modify-write runs under the
+        entry lock, and the entry keeps its expiry.
+        """
+        fname = self._key_to_file(key, version)
+        with self._entry_lock(fname):
+            entry = self._read(fname)
+            if entry is None:
+                raise ValueError(f"Key '{key}' not found")
+            expiry, value = entry
+            value += delta
+            tmp_path = self._write_temp(fname, expiry, value)
+            try:
+                os.replace(tmp_path, fname)
+            except BaseException:
+                _remove(tmp_path)
+                raise
+        return value
+
+    def _cull(self):
+        # The culler thread does this off the request path.
+        pass
+
+    def _namespace_dirs(self):
+        if not os.path.isdir(self._dir):
+            return []
+        return [entry.path for entry in os.scandir(self._dir) if entry.is_dir() and entry.name != TRASH_DIR]
+
+    def _list_cache_files(self):
+        files = []
+        for namespace_dir in self._namespace_dirs():
+            for directory, _, filenames in os.walk(namespace_dir):
+                files.extend(
+                    os.path.join(directory, name) for name in filenames if name.endswith(self.cache_suffix)
+                )
+        return files
+
+    def _trash(self, path):
+        trash = os.path.join(self._dir, TRASH_DIR)
+        _makedirs(trash)
+        try:
+            os.rename(path, os.path.join(trash, uuid.uuid4().hex))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete_prefix(self, prefix):
+        """
+        Delete every key in the namespace ``prefix`` (with or without the
+        trailing ':') with one rename; the files are removed by the culler.
+        """
+        return self._trash(self._namespace_dir(prefix.rstrip(':')))
+
+    def clear(self):
+        for namespace_dir in self._namespace_dirs():
+            self._trash(namespace_dir)
+
+    def cull(self):
+        """
+        Empty the trash, delete expired entries and, above MAX_ENTRIES, the
+        least recently written ones. Returns the number of live entries.
+        """
+        if not os.path.isdir(self._dir):
+            return 0
+        trash = os.path.join(self._dir, TRASH_DIR)
+        if os.path.isdir(trash):
+            for entry in os.scandir(trash):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+        # Entries left behind by FileBasedCache's flat layout.
+        for entry in os.scandir(self._dir):
+            if entry.is_file() and entry.name.endswith(self.cache_suffix):
+                self._delete(entry.path)
+
+        now = time.time()
+        live = []
+        kept = 0
+        keep_dirs = {self._namespace_dir(namespace) for namespace in self.keep_namespaces}
+        for namespace_dir in self._namespace_dirs():
+            keep = namespace_dir in keep_dirs
+            for directory, _, filenames in os.walk(namespace_dir):
+                for name in filenames:
+                    path = os.path.join(directory, name)
+                    try:
+                        if name.endswith('.tmp'):
+                            if now - os.path.getmtime(path) > STALE_TMP_AGE:
+                                os.remove(path)
+                            continue
+                        if not name.endswith(self.cache_suffix):
+                            # incr's lock files; they go with their namespace.
+                            continue
+                        with open(path, 'rb') as f:
+                            expired = self._is_expired(f)
+                        if expired:
+                            continue
+                        if keep:
+                            kept += 1
+                        else:
+                            live.append((os.path.getmtime(path), path))
+                    except FileNotFoundError:
+                        continue
+
+        if len(live) > self._max_entries:
+            if self._cull_frequency == 0:
+                doomed = live
+            else:
+                live.sort()
+                doomed = live[:max(len(live) - self._max_entries, len(live) // self._cull_frequency)]
+            for _, path in doomed:
+                self._delete(path)
+            return kept + len(live) - len(doomed)
+        return kept + len(live)
+
+    def _start_culler(self):
+        if self.cull_interval <= 0 or self._dir in _cullers:
+            return
+        with _cullers_lock:
+            if self._dir in _cullers:
+                return
+            thread = threading.Thread(
+                target=self._cull_forever, name=f'cache-culler:{self._dir}', daemon=True
+            )
+            _cullers[self._dir] = thread
+        thread.start()
+
+    def _cull_forever(self):
+        while True:
+            time.sleep(self.cull_interval)
+            try:
+                self.cull()
+            except Exception:
+                logger.exception("Culling %s failed", self._dir)
+
+
+_cullers = {}
+_cullers_lock = threading.Lock()
+
@@ -0,0 +1,192 @@
+"""
+Surrogate keys ("tags") for cached responses and fragments.
+
+Whatever renders a cached thing says what it depends on, either on the
+request (``tag_request``, picked up by CacheTagMiddleware once wagtailcache
+has stored the response) or directly on a cache key (``tag_key``). Each tag
+has a version under ``cache_tag:<tag>``, and a tagged entry gets a small
+stamp of the versions of its tags under ``cache_tag_stamp:<key>``, both in
+the entry's cache. ``purge_tags`` bumps the versions, and an entry whose
+stamp no longer matches (``is_current``) is treated as a miss, so a purge
+only affects the entries depending on what changed. The tags are::
+
+    page:<id>           the page itself: its content, title and url
+    children:<id>       the live children of a page (listings, menus)
+    image:<id>          an image file and its renditions
+    taxonomy:<label>    the terms of an AbstractBaseFilterModel
+    model:<label>       rows of a non-page model edited in the admin
+
+Tagging writes one entry of its own and purging one increment per tag, so
+neither grows with the number of entries under a tag nor races with
+another process tagging the same tag. A version that was evicted starts
+again from the current time, which matches no older stamp.
+
+Tags are usually known only once the data has been read, so versions read
+at tagging time could already include a purge of rows the entry was built
+from. Every purge therefore also bumps a purge epoch, which the renderer
+reads before it starts (``purge_epoch``) and passes to ``tag_key`` as
+``since``: if any purge ran in between, the entry is left unstamped, i.e.
+a miss, and the next request renders it again.
+"""
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from wagtail.images import get_image_model
+from wagtailcache.settings import wagtailcache_settings
+
+TAG_KEY_PREFIX = 'cache_tag:'
+STAMP_KEY_PREFIX = 'cache_tag_stamp:'
+PURGE_EPOCH_KEY = 'cache_tag:_epoch'
+# Outlives the entries it stamps; an entry without a stamp is a miss.
+TAG_TIMEOUT = 7 * 24 * 60 * 60
+
+_missing = object()
+
+
+def page_tag(page_id):
+    return f'page:{page_id}'
+
+
+def children_tag(page_id):
+    return f'children:{page_id}'
+
+
+def image_tag(image_id):
+    return f'image:{image_id}'
+
+
+def taxonomy_tag(model):
+    return f'taxonomy:{model._meta.label_lower}'
+
+
+def model_tag(model):
+    return f'model:{model._meta.label_lower}'
+
+
+def page_tags(page):
+    """
+    The page itself plus every image its own fields point at.
+    """
+    image_model = get_image_model()
+    tags = [page_tag(page.pk)]
+    for field in page._meta.concrete_fields:
+        if field.is_relation and field.related_model is image_model:
+            image_id = getattr(page, field.attname, None)
+            if image_id:
+                tags.append(image_tag(image_id))
+    return tags
+
+
+def tag_request(request, *tags):
+    """
+    Tag the response to ``request``, if it gets cached, with ``tags``.
+    """
+    if request is None:
+        return
+    if not hasattr(request, '_cache_tags'):
+        request._cache_tags = set()
+    request._cache_tags.update(tag for tag in tags if tag)
+
+
+def request_tags(request):
+    return getattr(request, '_cache_tags', set())
+
+
+def _get_or_start(backend, keys):
+    # Missing (never set, or evicted) counters start from the current time.
+    found = backend.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            backend.add(key, time.time_ns(), TAG_TIMEOUT)
+        found.update(backend.get_many(missing))
+    return found
+
+
+def tag_versions(tags, backend):
+    """
+    ``{tag: version}`` of ``tags`` in ``backend``, starting the missing ones.
+    """
+    version_keys = {f'{TAG_KEY_PREFIX}{tag}': tag for tag in tags if tag}
+    found = _get_or_start(backend, list(version_keys))
+    return {tag: found.get(key) for key, tag in version_keys.items()}
+
+
+def purge_epoch(using='default'):
+    """
+    The purge epoch of cache ``using``; read it before rendering and pass
+    it to ``tag_key`` as ``since``.
+    """
+    return _get_or_start(caches[using], [PURGE_EPOCH_KEY]).get(PURGE_EPOCH_KEY)
+
+
+def tag_key(key, tags, using='default', since=None):
+    """
+    Record that the entry ``key`` in cache ``using`` depends on ``tags``.
+    With ``since`` (a ``purge_epoch``), an entry rendered while a purge ran
+    is left without a stamp instead.
+    """
+    backend = caches[using]
+    stamp_key = f'{STAMP_KEY_PREFIX}{key}'
+    versions = tag_versions(tags, backend)
+    if since is not None and backend.get(PURGE_EPOCH_KEY) != since:
+        backend.delete(stamp_key)
+        return
+    backend.set(stamp_key, versions, TAG_TIMEOUT)
+
+
+def is_current(key, using='default'):
+    """
+    Whether no tag of the entry ``key`` was purged since it was tagged.
+    """
+    backend = caches[using]
+    stamp = backend.get(f'{STAMP_KEY_PREFIX}{key}')
+    if stamp is None:
+        return False
+    versions = backend.get_many([f'{TAG_KEY_PREFIX}{tag}' for tag in stamp])
+    return all(versions.get(f'{TAG_KEY_PREFIX}{tag}') == version for tag, version in stamp.items())
+
+
+def get_tagged(key, default=None, using='default'):
+    """
+    ``cache.get`` for an entry stored with ``tag_key``: ``default`` once
+    one of its tags was purged.
+    """
+    value = caches[using].get(key, _missing)
+    if value is _missing or not is_current(key, using):
+        return default
+    return value
+
+
+def _aliases():
+    aliases = ['default']
+    if wagtailcache_settings.WAGTAIL_CACHE_BACKEND not in aliases:
+        aliases.append(wagtailcache_settings.WAGTAIL_CACHE_BACKEND)
+    return aliases
+
+
+def purge_tags(*tags):
+    """
+    Invalidate every entry tagged with any of ``tags``.
+    """
+    version_keys = [f'{TAG_KEY_PREFIX}{tag}' for tag in set(tags) if tag]
+    if not version_keys:
+        return
+    for alias in _aliases():
+        backend = caches[alias]
+        # The epoch first: a render that started before it sees the bump.
+        for version_key in [PURGE_EPOCH_KEY, *version_keys]:
+            try:
+                backend.incr(version_key)
+            except ValueError:
+                # Never tagged, or evicted: nothing stamped with it is current.
+                pass
+
+
+def purge_tags_on_commit(*tags):
+    """
+    Purge once the edit is committed, so nothing re-caches the old rows.
+    """
+    tags = list(tags)
+    transaction.on_commit(lambda: purge_tags(*tags))
@@ -1,25 +1,85 @@
+from collections import namedtuple
+from functools import lru_cache
+
 from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
 from wagtail.models import Site
-from django.conf import settings
 
-def site_info(request):
+from home.cache_tags import children_tag, tag_request
+
+# Bumped whenever a site's menu may have changed, see home.signals.
+SITE_NAV_VERSION_KEY = 'version:site_nav'
+SITE_NAV_CACHE_TIMEOUT = 3600
+
+MenuPage = namedtuple('MenuPage', ['title', 'url'])
+
+
+@lru_cache(maxsize=None)
+def admin_prefixes():
+    return (reverse('wagtailadmin_home'), reverse('admin:index'))
+
+
+def skip_site_info(request):
+    # Admin screens, AJAX fragments and JSON never show the site menu.
+    return (
+        request.path.startswith(admin_prefixes())
+        or request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('accept', '')
+    )
+
+
+def build_site_nav(request):
     site = Site.find_for_request(request)
-    if site and site.root_page:
-        root_page = site.root_page
-        top_level_pages = root_page.get_children().live().in_menu()
-        cache_key = f"site_pages_{root_page.id}"
-
-        data = cache.get(cache_key) if settings.ENV == 'prod' else None
-        
-        if not data:
-            top_level_pages = root_page.get_children().live().in_menu()
-            pages = {page.slug.replace("-","_"): page for page in top_level_pages}
-            data = {
-                "site_pages": pages,
-                "site" : site
-            }
-            cache.set(cache_key, data, 300)  # 5 minutes
-
-        return data
-
-    return {}
\ No newline at end of file
+    if not site or not site.root_page_id:
+        return None
+    top_level_pages = site.root_page.get_children().live().in_menu()
+    return {
+        'root_page_id': site.root_page_id,
+        'pages': {
+            page.slug.replace("-", "_"): MenuPage(page.title, page.get_url(request))
+            for page in top_level_pages
+        },
+    }
+
+
+def site_info(request):
+    """
+    ``site_pages``: ``{slug: MenuPage(title, url)}`` for the menu pages of
+    the request's site, cached per host and menu version so a warm hit runs
+    no queries and resolves no urls.
+    """
+    if request is None or skip_site_info(request):
+        return {}
+    version = cache.get(SITE_NAV_VERSION_KEY, 0)
+    cache_key = f"site_nav:{version}:{request.get_host()}"
+    nav = cache.get(cache_key)
+    if nav is None:
+        nav = build_site_nav(request) or {}
+        cache.set(cache_key, nav, SITE_NAV_CACHE_TIMEOUT)
+    if not nav:
+        return {}
+    # Every page carries the menu, so its response goes when the menu changes.
+    tag_request(request, children_tag(nav['root_page_id']))
+    return {"site_pages": nav['pages']}
+
+
+def _bump_site_nav_version():
+    try:
+        cache.incr(SITE_NAV_VERSION_KEY)
+    except ValueError:
+        cache.set(SITE_NAV_VERSION_KEY, 1, None)
+
+
+def _refresh_program_snapshots():
+    from home.snapshots import snapshots_enabled
+    from home.tasks import refresh_all_program_snapshots
+
+    if snapshots_enabled():
+        refresh_all_program_snapshots.enqueue()
+
+
+def invalidate_site_nav():
+    transaction.on_commit(_bump_site_nav_version)
+    # Program snapshots are static copies of the page, menu included.
+    transaction.on_commit(_refresh_program_snapshots)
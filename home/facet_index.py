@@ -0,0 +1,311 @@
+"""
+Per-process facet index used by ProgramIndexPage filtering.
+
+Every live Program gets a slot (bit position) and every facet option,
+e.g. ``focus_topics`` / ``robotics``, maps to an int bitset of the programs
+tagged with it. A filter request is answered by OR-ing the options within a
+facet and AND-ing across facets, so the database only has to fetch the rows
+for the current results page.
+
+The index is built from ProgramSearchDocument rows and kept up to date
+incrementally from the publish / unpublish signals (see ``home.signals``).
+A version number in the shared cache tells the other worker processes that
+their copy is stale and must be rebuilt. It is only bumped once the change
+is committed, so nobody rebuilds from the old rows under the new version.
+A process patches its own copy only when its bump is the very next
+version, i.e. nobody else changed anything since it built that copy.
+Request threads read the index without the lock, so an update patches a
+copy and swaps it in.
+"""
+import threading
+import time
+from collections import defaultdict
+from itertools import islice
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+
+FACET_INDEX_VERSION_KEY = 'version:program_facet_index'
+
+
+def iter_bits(mask):
+    """
+    Yield the positions of the set bits of ``mask``, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class FacetResult:
+    """
+    Lazy, ordered list of the program ids matching a mask.
+    Supports ``count()`` and slicing, which is all Paginator needs.
+    """
+
+    def __init__(self, index, mask):
+        self.index = index
+        self.mask = mask
+
+    def count(self):
+        return self.mask.bit_count()
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        program_ids = self.index.program_ids
+        return (program_ids[slot] for slot in iter_bits(self.mask))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(islice(iter(self), key.start, key.stop, key.step))
+        return list(islice(iter(self), key, key + 1))[0]
+
+    def after(self, program_id):
+        """
+        The results following ``program_id``; keyset pagination cursors.
+        """
+        slot = self.index.slots.get(program_id)
+        if slot is None:
+            return self
+        return FacetResult(self.index, self.mask >> (slot + 1) << (slot + 1))
+
+    def before(self, program_id):
+        slot = self.index.slots.get(program_id)
+        if slot is None:
+            return FacetResult(self.index, 0)
+        return FacetResult(self.index, self.mask & ((1 << slot) - 1))
+
+    def last(self, n):
+        """
+        The final ``n`` program ids, in order, walking down from the top bit.
+        """
+        program_ids = self.index.program_ids
+        mask = self.mask
+        tail = []
+        while mask and len(tail) < n:
+            slot = mask.bit_length() - 1
+            tail.append(program_ids[slot])
+            mask ^= 1 << slot
+        return tail[::-1]
+
+
+class ProgramFacetIndex:
+
+    def __init__(self):
+        from home.opportunity_model import PROGRAM_FACET_FIELDS
+
+        self.facets = list(PROGRAM_FACET_FIELDS)
+        self.slots = {}         # program id -> slot
+        self.program_ids = []   # slot -> program id
+        self.paths = []         # slot -> treebeard path
+        self.live = 0
+        self.bits = {facet: defaultdict(int) for facet in self.facets}
+        self.version = None     # shared version this copy corresponds to
+        self._scopes = {}
+
+    def build(self):
+        ProgramSearchDocument = apps.get_model('home', 'ProgramSearchDocument')
+        # Slots are handed out in path order so that walking the bits of a
+        # mask returns programs in the same order as the page tree.
+        rows = ProgramSearchDocument.objects.order_by('path').values_list(
+            'pk', 'path', *self.facets
+        )
+        for pk, path, *facet_slugs in rows:
+            bit = 1 << self._slot_for(pk, path)
+            for facet, slugs in zip(self.facets, facet_slugs):
+                for slug in slugs:
+                    self.bits[facet][slug] |= bit
+            self.live |= bit
+        return self
+
+    def copy(self):
+        """
+        An independent copy to patch; the bitsets themselves are ints.
+        """
+        index = ProgramFacetIndex.__new__(ProgramFacetIndex)
+        index.facets = self.facets
+        index.slots = dict(self.slots)
+        index.program_ids = list(self.program_ids)
+        index.paths = list(self.paths)
+        index.live = self.live
+        index.bits = {facet: defaultdict(int, facet_bits) for facet, facet_bits in self.bits.items()}
+        index.version = self.version
+        index._scopes = dict(self._scopes)
+        return index
+
+    def _slot_for(self, pk, path):
+        slot = self.slots.get(pk)
+        if slot is None:
+            slot = len(self.program_ids)
+            self.slots[pk] = slot
+            self.program_ids.append(pk)
+            self.paths.append(path)
+            self._scopes.clear()
+        elif self.paths[slot] != path:
+            self.paths[slot] = path
+            self._scopes.clear()
+        return slot
+
+    def _clear_slot(self, slot):
+        keep = ~(1 << slot)
+        for facet_bits in self.bits.values():
+            for slug in facet_bits:
+                facet_bits[slug] &= keep
+        self.live &= keep
+
+    def add(self, document):
+        """
+        (Re)index a program from its ProgramSearchDocument.
+        """
+        slot = self._slot_for(document.pk, document.path)
+        bit = 1 << slot
+        self._clear_slot(slot)
+        for facet in self.facets:
+            for slug in getattr(document, facet):
+                self.bits[facet][slug] |= bit
+        self.live |= bit
+
+    def discard(self, program_id):
+        slot = self.slots.get(program_id)
+        if slot is not None:
+            self._clear_slot(slot)
+
+    def scope(self, path):
+        """
+        Bitset of the live programs below the page at ``path``.
+        """
+        mask = self._scopes.get(path)
+        if mask is None:
+            mask = 0
+            for slot, slot_path in enumerate(self.paths):
+                if slot_path.startswith(path) and slot_path != path:
+                    mask |= 1 << slot
+            self._scopes[path] = mask
+        return mask & self.live
+
+    def filter(self, selected_filters, scope=None):
+        """
+        OR the selected options within a facet, AND across facets.
+        """
+        mask = self.live if scope is None else self.scope(scope)
+        for facet, slugs in selected_filters.items():
+            facet_bits = self.bits.get(facet)
+            if facet_bits is None:
+                continue
+            facet_mask = 0
+            for slug in slugs:
+                facet_mask |= facet_bits.get(slug, 0)
+            mask &= facet_mask
+        return mask
+
+    def facet_counts(self, selected_filters, scope=None, within=None):
+        """
+        Disjunctive counts for every facet option: each facet is counted
+        against the other facets' selections, ignoring its own, so the
+        numbers say what ticking one more box would return.
+        """
+        base = self.live if scope is None else self.scope(scope)
+        if within is not None:
+            base &= within
+        selected_masks = {}
+        for facet, slugs in selected_filters.items():
+            facet_bits = self.bits.get(facet)
+            if facet_bits is not None:
+                selected_masks[facet] = self.filter({facet: slugs})
+
+        counts = {}
+        for facet, facet_bits in self.bits.items():
+            mask = base
+            for other, other_mask in selected_masks.items():
+                if other != facet:
+                    mask &= other_mask
+            counts[facet] = {slug: (bits & mask).bit_count() for slug, bits in facet_bits.items()}
+        return counts
+
+    def mask_of(self, program_ids):
+        mask = 0
+        for pk in program_ids:
+            slot = self.slots.get(pk)
+            if slot is not None:
+                mask |= 1 << slot
+        return mask
+
+    def contains(self, mask, program_id):
+        slot = self.slots.get(program_id)
+        return slot is not None and bool(mask >> slot & 1)
+
+    def results(self, mask):
+        return FacetResult(self, mask)
+
+
+_index = None
+_index_version = None
+_lock = threading.Lock()
+
+
+def _bump_version():
+    try:
+        return cache.incr(FACET_INDEX_VERSION_KEY)
+    except ValueError:
+        # Missing or evicted: restart from a number no older copy can hold.
+        version = time.time_ns()
+        if cache.add(FACET_INDEX_VERSION_KEY, version, None):
+            return version
+        return cache.incr(FACET_INDEX_VERSION_KEY)
+
+
+def get_program_facet_index():
+    """
+    Return this process' facet index, rebuilding it when another process
+    has bumped the shared version.
+    """
+    global _index, _index_version
+    version = cache.get(FACET_INDEX_VERSION_KEY)
+    if _index is None or version != _index_version:
+        with _lock:
+            if _index is None or version != _index_version:
+                _index = ProgramFacetIndex().build()
+                _index.version = _index_version = version
+    return _index
+
+
+def update_program(program_id, document=None):
+    """
+    Apply a single program change to the local index and tell the other
+    processes to rebuild theirs, once the transaction commits. Without a
+    document the program is dropped.
+    """
+    transaction.on_commit(lambda: _apply_program_update(program_id, document))
+
+
+def _apply_program_update(program_id, document):
+    global _index, _index_version
+    with _lock:
+        version = _bump_version()
+        if _index is not None and _index_version is not None and version == _index_version + 1:
+            index = _index.copy()
+            if document is not None:
+                index.add(document)
+            else:
+                index.discard(program_id)
+            index.version = version
+            _index = index
+        else:
+            # Someone else bumped in between; their change isn't in our copy.
+            _index = None
+        _index_version = version
+
+
+def invalidate_program_facet_index():
+    """
+    Drop this process' copy now and tell the others once the change is
+    committed.
+    """
+    global _index
+    with _lock:
+        _index = None
+    transaction.on_commit(_bump_version)
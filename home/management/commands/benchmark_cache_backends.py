@@ -0,0 +1,87 @@
+import shutil
+import statistics
+import tempfile
+import time
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management.base import BaseCommand
+from home.cache_backends import ShardedFileCache
+
+BACKENDS = (
+    ('stock', FileBasedCache),
+    ('sharded', ShardedFileCache),
+)
+VALUE = {'html': 'x' * 2048, 'ids': list(range(50))}
+
+
+class Command(BaseCommand):
+    """
+    Fills a throwaway directory per backend with --entries keys, then times
+    writes, reads and dropping one key namespace at that size.
+    python manage.py benchmark_cache_backends --entries 100000 --samples 200
+    """
+    help = 'Compares FileBasedCache with ShardedFileCache at a given cache size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=100000)
+        parser.add_argument('--samples', type=int, default=200, help='Timed operations per measurement')
+        parser.add_argument('--namespaces', type=int, default=10, help='Key prefixes the entries are spread over')
+
+    def handle(self, *args, **options):
+        entries = max(options['entries'], 1)
+        samples = max(options['samples'], 1)
+        namespaces = max(options['namespaces'], 1)
+        keys = [f'ns{i % namespaces}:entry-{i}' for i in range(entries)]
+
+        self.stdout.write(
+            f"{'backend':<10}{'fill s':>9}{'set med ms':>12}{'set p95 ms':>12}"
+            f"{'get med ms':>12}{'drop prefix ms':>16}"
+        )
+        for name, backend_class in BACKENDS:
+            directory = tempfile.mkdtemp(prefix=f'cache-bench-{name}-')
+            try:
+                self.stdout.write(self.run(name, backend_class, directory, keys, samples))
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def run(self, name, backend_class, directory, keys, samples):
+        # MAX_ENTRIES above the fill size: the stock backend still lists the
+        # whole directory on every set before deciding not to cull.
+        params = {'TIMEOUT': 3600, 'OPTIONS': {'MAX_ENTRIES': len(keys) * 2, 'CULL_INTERVAL': 0}}
+        cache = backend_class(directory, params)
+
+        started = time.perf_counter()
+        cull = cache._cull
+        cache._cull = lambda: None  # filling isn't what's being measured
+        for key in keys:
+            cache.set(key, VALUE)
+        cache._cull = cull
+        fill = time.perf_counter() - started
+
+        sets = self.time_each(lambda i: cache.set(f'ns0:extra-{i}', VALUE), samples)
+        gets = self.time_each(lambda i: cache.get(keys[i * 7919 % len(keys)]), samples)
+
+        # Every key of one namespace: a directory rename for the sharded
+        # backend, one delete per key otherwise.
+        doomed = [key for key in keys if key.startswith('ns1:')]
+        started = time.perf_counter()
+        if hasattr(cache, 'delete_prefix'):
+            cache.delete_prefix('ns1')
+        else:
+            for key in doomed:
+                cache.delete(key)
+        drop = (time.perf_counter() - started) * 1000
+
+        sets.sort()
+        p95 = sets[min(len(sets) - 1, int(len(sets) * 0.95))]
+        return (
+            f"{name:<10}{fill:>9.1f}{statistics.median(sets):>12.3f}{p95:>12.3f}"
+            f"{statistics.median(gets):>12.3f}{drop:>16.1f}"
+        )
+
+    def time_each(self, operation, samples):
+        timings = []
+        for i in range(samples):
+            started = time.perf_counter()
+            operation(i)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
@@ -0,0 +1,42 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from home.models import ProgramIndexPage
+
+SEARCH_MODES = ('postgres', 'wagtail')
+
+
+class Command(BaseCommand):
+    """
+    python manage.py benchmark_program_search robotics "summer camp" --repeat 50
+    """
+    help = 'Compares program search latency of the weighted tsvector mode against the Wagtail search backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries',
+            nargs='*',
+            default=['robotics', 'coding', 'summer camp', 'math competition', 'girls engineering'],
+            help='Search terms to time'
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query and mode')
+
+    def handle(self, *args, **options):
+        index_page = ProgramIndexPage.objects.live().first()
+        if not index_page:
+            raise CommandError("No live ProgramIndexPage to search under.")
+
+        repeat = max(options['repeat'], 1)
+        self.stdout.write(f"{'mode':<10}{'query':<24}{'hits':>6}{'median ms':>12}{'p95 ms':>10}")
+        for mode in SEARCH_MODES:
+            for query in options['queries']:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    ids = index_page.search_ids(query, mode=mode)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                self.stdout.write(
+                    f"{mode:<10}{query[:23]:<24}{len(ids):>6}{statistics.median(timings):>12.2f}{p95:>10.2f}"
+                )
@@ -0,0 +1,282 @@
+import csv
+import os
+import time
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.utils import timezone
+from django.utils.text import slugify
+from modelsearch.signal_handlers import post_save_signal_handler
+from wagtail.models import Locale, Page, Revision
+from wagtail.search.backends import get_search_backends
+from home.cache_tags import children_tag, page_tag, purge_tags_on_commit
+from home.facet_index import invalidate_program_facet_index
+from home.models import PROGRAM_FACET_FIELDS, Program, ProgramIndexPage, ProgramSearchDocument
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'x'}
+# Set by the importer itself, never read from the sheet.
+SKIPPED_COLUMNS = {'page_ptr', 'logo_image', 'gotham_state'}
+
+
+class Command(BaseCommand):
+    """
+    Streams a CSV / XLSX sheet into live Program pages. The first row holds
+    Program field names ('title' is required); facet columns such as
+    focus_topics take taxonomy names or slugs separated by --separator.
+    python manage.py import_programs programs.xlsx --parent 12
+    """
+    help = 'Bulk imports live Program pages from a CSV or XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file')
+        parser.add_argument('--parent', type=int, help='ProgramIndexPage id (default: the first one)')
+        parser.add_argument('--sheet', help='Worksheet name for XLSX files (default: the active sheet)')
+        parser.add_argument('--separator', default=',', help='Separator between facet values in one cell')
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist.")
+
+        parent = self.get_parent(options['parent'])
+        self.separator = options['separator']
+        self.batch_size = max(options['batch_size'], 1)
+        self.prepare(parent)
+
+        started = time.perf_counter()
+        created_ids = []
+        skipped = 0
+        batch = []
+        # The search index is refreshed once per batch instead of per page.
+        post_save.disconnect(post_save_signal_handler, sender=Program)
+        try:
+            for line, row in self.read_rows(path, options['sheet']):
+                try:
+                    batch.append(self.build(row))
+                except ValidationError as e:
+                    skipped += 1
+                    self.stderr.write(f"Row {line} skipped: {'; '.join(e.messages)}")
+                    continue
+                if len(batch) >= self.batch_size:
+                    created_ids += self.write_batch(parent, batch)
+                    batch = []
+            if batch:
+                created_ids += self.write_batch(parent, batch)
+        finally:
+            post_save.connect(post_save_signal_handler, sender=Program)
+
+        total = time.perf_counter() - started
+        rate = len(created_ids) / total if total else 0
+        for facet, values in sorted(self.unknown.items()):
+            self.stderr.write(f"Unknown {facet} values ignored: {', '.join(sorted(values))}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(created_ids)} programs imported, {skipped} rows skipped in {total:.2f}s ({rate:.1f} rows/sec)."
+        ))
+
+    def get_parent(self, parent_id):
+        parents = ProgramIndexPage.objects.all()
+        parent = parents.filter(pk=parent_id).first() if parent_id else parents.first()
+        if parent is None:
+            raise CommandError("No ProgramIndexPage to import into.")
+        return parent
+
+    def prepare(self, parent):
+        """
+        Everything looked up per row is loaded once up front.
+        """
+        self.fields = {
+            field.name: field
+            for field in Program._meta.concrete_fields
+            if field.model is Program and field.name not in SKIPPED_COLUMNS
+        }
+        self.options = {}
+        self.through = {}
+        for facet in PROGRAM_FACET_FIELDS:
+            m2m = Program._meta.get_field(facet)
+            target = m2m.related_model
+            self.options[facet] = dict(target.objects.values_list('slug', 'pk'))
+            through = m2m.remote_field.through
+            target_field = next(
+                f.name for f in through._meta.concrete_fields
+                if f.is_relation and f.related_model is target
+            )
+            self.through[facet] = (through, target_field)
+        self.unknown = {}
+        self.slugs = set(parent.get_children().values_list('slug', flat=True))
+        self.content_type = ContentType.objects.get_for_model(Program)
+        self.base_content_type = ContentType.objects.get_for_model(Page)
+        self.locale = Locale.get_default()
+        self.warned_columns = set()
+
+    def read_rows(self, path, sheet_name=None):
+        """
+        Yield (line number, {column: value}) without loading the whole file.
+        """
+        if path.lower().endswith(('.xlsx', '.xlsm')):
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(path, read_only=True, data_only=True)
+            try:
+                sheet = workbook[sheet_name] if sheet_name else workbook.active
+                rows = sheet.iter_rows(values_only=True)
+                header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+                for line, values in enumerate(rows, start=2):
+                    if any(value not in (None, '') for value in values):
+                        yield line, dict(zip(header, values))
+            finally:
+                workbook.close()
+        else:
+            with open(path, newline='', encoding='utf-8-sig') as handle:
+                reader = csv.DictReader(handle)
+                reader.fieldnames = [name.strip() for name in reader.fieldnames or []]
+                for line, row in enumerate(reader, start=2):
+                    if any(row.values()):
+                        yield line, row
+
+    def build(self, row):
+        """
+        An unsaved Program plus its facet option ids.
+        """
+        title = str(row.get('title') or '').strip()
+        if not title:
+            raise ValidationError("title is empty")
+
+        program = Program(title=title, draft_title=title, slug=self.unique_slug(row.get('slug') or title))
+        facets = {}
+        for column, value in row.items():
+            if column in ('title', 'slug', '') or value in (None, ''):
+                continue
+            if column in self.through:
+                facets[column] = self.option_ids(column, value)
+            elif column in self.fields:
+                setattr(program, column, self.to_python(self.fields[column], value))
+            elif column not in self.warned_columns:
+                self.warned_columns.add(column)
+                self.stderr.write(f"Column {column!r} is not a Program field, ignored.")
+        return program, facets
+
+    def to_python(self, field, value):
+        if isinstance(field, models.BooleanField) and isinstance(value, str):
+            return value.strip().lower() in TRUE_VALUES
+        if type(field) is models.DateField and hasattr(value, 'date'):
+            return value.date()
+        if isinstance(value, str):
+            value = value.strip()
+        elif isinstance(field, (models.CharField, models.TextField)):
+            value = str(value)
+        return field.to_python(value)
+
+    def option_ids(self, facet, value):
+        ids = []
+        for name in str(value).split(self.separator):
+            slug = slugify(name.strip())
+            if not slug:
+                continue
+            pk = self.options[facet].get(slug)
+            if pk is None:
+                self.unknown.setdefault(facet, set()).add(name.strip())
+            elif pk not in ids:
+                ids.append(pk)
+        return ids
+
+    def unique_slug(self, value):
+        base = slugify(str(value))[:240] or 'program'
+        slug, suffix = base, 2
+        while slug in self.slugs:
+            slug = f"{base}-{suffix}"
+            suffix += 1
+        self.slugs.add(slug)
+        return slug
+
+    @transaction.atomic
+    def write_batch(self, parent, batch):
+        """
+        One batch: Page rows with precomputed treebeard paths in a single
+        INSERT, the Program rows, then every through table in one INSERT each.
+        Revisions, listing documents and the search index are written in the
+        same transaction, so a committed batch is complete and searchable.
+        """
+        parent = Page.objects.select_for_update().get(pk=parent.pk)
+        last_child = parent.get_last_child()
+        step = Page._str2int(last_child.path[-Page.steplen:]) if last_child else 0
+        now = timezone.now()
+
+        pages = []
+        for program, _ in batch:
+            step += 1
+            pages.append(Page(
+                title=program.title,
+                draft_title=program.title,
+                slug=program.slug,
+                content_type=self.content_type,
+                locale=self.locale,
+                path=Page._get_path(parent.path, parent.depth + 1, step),
+                depth=parent.depth + 1,
+                numchild=0,
+                url_path=f"{parent.url_path}{program.slug}/",
+                live=True,
+                has_unpublished_changes=False,
+                first_published_at=now,
+                last_published_at=now,
+            ))
+        Page.objects.bulk_create(pages)
+
+        for page, (program, _) in zip(pages, batch):
+            program.page_ptr_id = program.id = page.pk
+            program.gotham_state = 'live'
+            # raw=True writes just the home_program row; the Page row above
+            # is its parent and Program.save's re-fetch is skipped.
+            program.save_base(raw=True, force_insert=True)
+
+        for facet, (through, target_field) in self.through.items():
+            through.objects.bulk_create([
+                through(page_id=program.pk, **{f'{target_field}_id': pk})
+                for program, facets in batch
+                for pk in facets.get(facet, ())
+            ])
+
+        Page.objects.filter(pk=parent.pk).update(numchild=F('numchild') + len(pages))
+        program_ids = [page.pk for page in pages]
+        self.add_revisions(pages, now)
+        self.refresh(parent, program_ids)
+        return program_ids
+
+    def add_revisions(self, pages, now):
+        """
+        The initial revision of each page, as ``save_revision().publish()``
+        would leave it: both the latest and the live revision.
+        """
+        programs = Program.objects.filter(pk__in=[page.pk for page in pages]).prefetch_related(
+            *PROGRAM_FACET_FIELDS
+        )
+        revisions = Revision.objects.bulk_create([
+            Revision(
+                content_type=self.content_type,
+                base_content_type=self.base_content_type,
+                object_id=str(program.pk),
+                created_at=now,
+                content=program.serializable_data(),
+                object_str=str(program),
+            )
+            for program in programs
+        ])
+        revision_ids = {int(revision.object_id): revision.pk for revision in revisions}
+        for page in pages:
+            page.latest_revision_id = page.live_revision_id = revision_ids[page.pk]
+        Page.objects.bulk_update(pages, ['latest_revision', 'live_revision'])
+
+    def refresh(self, parent, program_ids):
+        """
+        One pass per batch for the listing documents, the search index and
+        the cached listings; a batch is live as soon as it commits.
+        """
+        programs = Program.objects.filter(pk__in=program_ids)
+        ProgramSearchDocument.rebuild(programs)
+        for backend in get_search_backends(with_auto_update=True):
+            backend.add_bulk(Program, list(programs))
+        invalidate_program_facet_index()
+        purge_tags_on_commit(children_tag(parent.pk), *[page_tag(pk) for pk in program_ids])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from home.facet_index import invalidate_program_facet_index
+from home.models import ProgramSearchDocument
+
+
+class Command(BaseCommand):
+    """
+    Run once after migrating, and whenever the documents need to be rewritten
+    outside of the publish flow.
+    python manage.py rebuild_program_documents
+    """
+    help = 'Rebuilds the denormalised ProgramSearchDocument rows for all live programs'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding program search documents...")
+        count = ProgramSearchDocument.rebuild()
+        invalidate_program_facet_index()
+        self.stdout.write(self.style.SUCCESS(f"{count} program documents written."))
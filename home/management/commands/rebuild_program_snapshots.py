@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from home.models import Program
+from home import snapshots
+
+
+def write_chunk(program_ids):
+    try:
+        written = 0
+        for program in Program.objects.live().filter(pk__in=program_ids):
+            if snapshots.write_program_snapshot(program):
+                written += 1
+        return written
+    finally:
+        # Each worker thread opened its own connection.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """
+    Re-render the static snapshot of every live program, e.g. after a deploy
+    that changed the templates, then delete the files nothing points at.
+    python manage.py rebuild_program_snapshots --workers 8
+    """
+    help = 'Rebuilds the static HTML snapshots of all live Program pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--chunk-size', type=int, default=25)
+
+    def handle(self, *args, **options):
+        if not snapshots.snapshots_enabled():
+            raise CommandError("PROGRAM_SNAPSHOTS is off.")
+
+        started = time.perf_counter()
+        program_ids = list(Program.objects.live().order_by('path').values_list('pk', flat=True))
+        size = max(options['chunk_size'], 1)
+        chunks = [program_ids[i:i + size] for i in range(0, len(program_ids), size)]
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            written = sum(pool.map(write_chunk, chunks))
+
+        live = set(program_ids)
+        for page_id in snapshots.snapshot_page_ids() - live:
+            snapshots.remove_program_snapshot(page_id)
+        pruned = snapshots.prune_objects(snapshots.live_hashes())
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} program snapshots written, {pruned} stale snapshots removed in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from wagtail.models import Page
+from home.models import ProgramIndexPage
+from home.warming import page_url, top_listing_urls, warm_urls
+
+
+class Command(BaseCommand):
+    """
+    Render every live page (and the most requested program filter
+    combinations from the access logs) so the first visitors after a
+    deploy get cached responses.
+    python manage.py warm_cache --workers 8 --access-log /var/log/nginx/access.log --top 50
+    """
+    help = 'Warms the page cache by requesting every live page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent requests (1 renders inline)')
+        parser.add_argument('--access-log', action='append', default=[], help='Access log to mine for program filter URLs; repeatable')
+        parser.add_argument('--top', type=int, default=20, help='Program filter combinations to warm from the logs')
+        parser.add_argument('--slowest', type=int, default=10, help='Slowest pages listed in the summary')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        pages = Page.objects.live().filter(depth__gt=1).specific().order_by('path')
+        urls = [url for url in (page_url(page) for page in pages) if url]
+        if options['access_log']:
+            try:
+                urls += top_listing_urls(options['access_log'], ProgramIndexPage.objects.live(), options['top'])
+            except OSError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(f"Warming {len(urls)} URLs with {options['workers']} workers...")
+        results = warm_urls(urls, workers=options['workers'])
+        for result in results:
+            line = f"{result.status} {result.cache or '-':>4} {result.seconds * 1000:8.1f} ms  {result.url}"
+            self.stdout.write(line if result.status < 400 else self.style.WARNING(line))
+
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for result in results if result.status >= 400)
+        self.stdout.write("Slowest:")
+        for result in sorted(results, key=lambda r: r.seconds, reverse=True)[:options['slowest']]:
+            self.stdout.write(f"  {result.seconds * 1000:8.1f} ms  {result.url}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results) - failed} URLs warmed, {failed} failed in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,198 @@
+import logging
+import os
+import re
+import time
+
+from django.core.cache import caches
+from django.http import FileResponse
+from django.utils.cache import (
+    get_conditional_response,
+    get_max_age,
+    patch_cache_control,
+    patch_response_headers,
+    patch_vary_headers,
+)
+from wagtailcache.cache import FetchFromCacheMiddleware, Status, UpdateCacheMiddleware, _get_cache_key
+from wagtailcache.settings import wagtailcache_settings
+
+from home import warming
+from home.cache_tags import is_current, purge_epoch, request_tags, tag_key
+from home.snapshots import object_path, snapshot_for, snapshots_enabled
+
+logger = logging.getLogger(__name__)
+
+# Best first: (Content-Encoding, file suffix, Accept-Encoding pattern)
+ACCEPT_ENCODINGS = [
+    ('br', '.br', re.compile(r'\bbr\b')),
+    ('gzip', '.gz', re.compile(r'\bgzip\b')),
+]
+
+# (fresh until, soft, hard) of a stale-while-revalidate response, by cache key
+FRESHNESS_KEY_PREFIX = 'swr_fresh:'
+# Held by whoever is re-rendering a stale response; bounds a failed refresh.
+REFRESH_LOCK_PREFIX = 'swr_refresh:'
+REFRESH_LOCK_TIMEOUT = 60
+
+
+class ProgramSnapshotMiddleware:
+    """
+    Serve anonymous GET / HEAD requests for Program pages from their static
+    snapshot (see home.snapshots), in the best encoding the client accepts.
+    Sits just before wagtailcache's FetchFromCacheMiddleware; everything
+    else falls through untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = None
+        if snapshots_enabled() and self.can_serve(request):
+            response = self.serve_snapshot(request)
+        return response or self.get_response(request)
+
+    def can_serve(self, request):
+        return (
+            request.method in ('GET', 'HEAD')
+            and not request.GET
+            and not request.user.is_authenticated
+        )
+
+    def serve_snapshot(self, request):
+        content_hash = snapshot_for(request.get_host(), request.path)
+        if content_hash is None:
+            return None
+
+        etag = f'"{content_hash}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['X-Snapshot'] = 'hit'
+            return not_modified
+
+        accept = request.headers.get('accept-encoding', '')
+        for encoding, suffix, pattern in ACCEPT_ENCODINGS:
+            path = object_path(content_hash, suffix)
+            if pattern.search(accept) and os.path.exists(path):
+                break
+        else:
+            encoding, path = None, object_path(content_hash)
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+
+        response = FileResponse(handle, content_type='text/html; charset=utf-8')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['X-Snapshot'] = 'hit'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class CacheTagMiddleware:
+    """
+    Stamp the response wagtailcache just stored with the tags collected
+    while rendering it (see home.cache_tags); an untagged response gets an
+    empty stamp, since StaleWhileRevalidateFetchMiddleware serves only
+    stamped ones. The purge epoch is read before the view runs, so a
+    response rendered while a purge ran stays unstamped. Must come before
+    UpdateCacheMiddleware so it sees the response after it was stored.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        alias = wagtailcache_settings.WAGTAIL_CACHE_BACKEND
+        since = None
+        if wagtailcache_settings.WAGTAIL_CACHE and request.method in ('GET', 'HEAD'):
+            since = purge_epoch(using=alias)
+        response = self.get_response(request)
+        header = response.get(wagtailcache_settings.WAGTAIL_CACHE_HEADER)
+        if since is not None and header == Status.MISS.value:
+            cache_key = _get_cache_key(request, caches[alias])
+            if cache_key:
+                tag_key(cache_key, request_tags(request), using=alias, since=since)
+        return response
+
+
+class StaleWhileRevalidateFetchMiddleware(FetchFromCacheMiddleware):
+    """
+    wagtailcache's FetchFromCacheMiddleware for page types with soft / hard
+    TTLs in ``STALE_WHILE_REVALIDATE_TTLS``: past the soft TTL the stored
+    response is still served, until the hard TTL, while one background
+    request re-renders it. The refresh takes a lock in the cache, so a
+    traffic spike on an expired page costs one render instead of one per
+    worker. Our own refresh requests skip the lookup and re-store the page.
+    Responses a tag purge has invalidated are misses.
+    """
+
+    def process_request(self, request):
+        if wagtailcache_settings.WAGTAIL_CACHE and warming.is_refresh_request(request):
+            request._wagtailcache_update = True
+            return None
+        response = super().process_request(request)
+        if response is None:
+            return None
+        try:
+            cache_key = _get_cache_key(request, self._wagcache)
+            if not (cache_key and is_current(cache_key, using=wagtailcache_settings.WAGTAIL_CACHE_BACKEND)):
+                request._wagtailcache_update = True
+                return None
+        except Exception:
+            logger.exception("Could not check the tags of a cached page.")
+            return response
+        try:
+            self.revalidate(request, cache_key)
+        except Exception:
+            logger.exception("Could not check the freshness of a cached page.")
+        return response
+
+    def revalidate(self, request, cache_key):
+        freshness = self._wagcache.get(f'{FRESHNESS_KEY_PREFIX}{cache_key}')
+        if freshness is None:
+            return
+        fresh_until, soft, hard = freshness
+        request._cache_ttls = (soft, hard)
+        request._cache_fresh_until = fresh_until
+        if time.time() >= fresh_until and self._wagcache.add(
+            f'{REFRESH_LOCK_PREFIX}{cache_key}', True, REFRESH_LOCK_TIMEOUT
+        ):
+            warming.start_refresh(request.build_absolute_uri())
+
+
+class StaleWhileRevalidateUpdateMiddleware(UpdateCacheMiddleware):
+    """
+    wagtailcache's UpdateCacheMiddleware storing stale-while-revalidate
+    pages for their hard TTL along with when they go stale. Clients are
+    told how long the stored copy stays fresh as ``max-age`` (the soft TTL
+    on a miss, what is left of it on a hit), and the time from then until
+    its hard expiry as ``stale-while-revalidate``.
+    """
+
+    def process_response(self, request, response):
+        ttls = getattr(request, '_cache_ttls', None)
+        storing = ttls and getattr(request, '_wagtailcache_update', False) and response.status_code == 200
+        if storing and get_max_age(response) is None:
+            patch_cache_control(response, max_age=ttls[1])
+        response = super().process_response(request, response)
+        if not ttls:
+            return response
+
+        status = response.get(wagtailcache_settings.WAGTAIL_CACHE_HEADER)
+        soft, hard = ttls
+        now = time.time()
+        fresh_until = getattr(request, '_cache_fresh_until', now + soft)
+        if storing and status == Status.MISS.value:
+            fresh_until = now + soft
+            cache_key = _get_cache_key(request, self._wagcache)
+            if cache_key:
+                self._wagcache.set(f'{FRESHNESS_KEY_PREFIX}{cache_key}', (fresh_until, soft, hard), hard)
+                self._wagcache.delete(f'{REFRESH_LOCK_PREFIX}{cache_key}')
+        if status in (Status.MISS.value, Status.HIT.value):
+            expires_at = fresh_until - soft + hard
+            response.headers.pop('Expires', None)
+            patch_response_headers(response, max(0, round(fresh_until - now)))
+            patch_cache_control(response, stale_while_revalidate=max(0, round(expires_at - max(now, fresh_until))))
+        return response
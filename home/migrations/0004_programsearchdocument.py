@@ -0,0 +1,54 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:34
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0003_resourcesearchresultpage'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='resourceacademicstage',
+            options={'ordering': ['name'], 'verbose_name': 'Resource Academic Stage', 'verbose_name_plural': 'Resource Academic Stages'},
+        ),
+        migrations.AlterModelOptions(
+            name='resourcecategory',
+            options={'ordering': ['name'], 'verbose_name': 'Resource Category', 'verbose_name_plural': 'Resource Categories'},
+        ),
+        migrations.CreateModel(
+            name='ProgramSearchDocument',
+            fields=[
+                ('program', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='home.program')),
+                ('path', models.CharField(db_index=True, max_length=255)),
+                ('url', models.CharField(blank=True, max_length=255)),
+                ('title', models.CharField(max_length=255)),
+                ('summary', models.TextField(blank=True)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('state', models.CharField(blank=True, max_length=50)),
+                ('website', models.URLField(blank=True, max_length=255)),
+                ('is_exceptional', models.BooleanField(default=False)),
+                ('application_deadline', models.DateField(blank=True, null=True)),
+                ('logo_url', models.CharField(blank=True, max_length=255)),
+                ('last_published_at', models.DateTimeField(blank=True, null=True)),
+                ('program_types', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('program_delivery', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('focus_topics', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('locations', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('nyc_neighborhood', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('session_start', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('session_length', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('age_groups', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('gender', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('fees_category', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['program_types'], name='progdoc_program_types_gin'), django.contrib.postgres.indexes.GinIndex(fields=['program_delivery'], name='progdoc_program_delivery_gin'), django.contrib.postgres.indexes.GinIndex(fields=['focus_topics'], name='progdoc_focus_topics_gin'), django.contrib.postgres.indexes.GinIndex(fields=['locations'], name='progdoc_locations_gin'), django.contrib.postgres.indexes.GinIndex(fields=['nyc_neighborhood'], name='progdoc_nyc_neighborhood_gin'), django.contrib.postgres.indexes.GinIndex(fields=['session_start'], name='progdoc_session_start_gin'), django.contrib.postgres.indexes.GinIndex(fields=['session_length'], name='progdoc_session_length_gin'), django.contrib.postgres.indexes.GinIndex(fields=['age_groups'], name='progdoc_age_groups_gin'), django.contrib.postgres.indexes.GinIndex(fields=['gender'], name='progdoc_gender_gin'), django.contrib.postgres.indexes.GinIndex(fields=['fees_category'], name='progdoc_fees_category_gin')],
+            },
+        ),
+    ]
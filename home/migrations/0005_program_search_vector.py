@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:37
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0004_programsearchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='programsearchdocument',
+            name='overview',
+            field=models.TextField(blank=True, help_text='Plain text of the program overview, for search.'),
+        ),
+        migrations.AddField(
+            model_name='programsearchdocument',
+            name='provider',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='programsearchdocument',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='programsearchdocument',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='progdoc_search_vector_gin'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_program_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='programsearchdocument',
+            name='essential_info',
+            field=models.JSONField(editable=False, help_text="Snapshot of the detail page's Essential Information rows.", null=True),
+        ),
+        migrations.AddField(
+            model_name='programsearchdocument',
+            name='index_url',
+            field=models.CharField(blank=True, help_text='URL of the parent listing, for the breadcrumb.', max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0006_program_essential_info_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='programsearchdocument',
+            name='logo_picture',
+            field=models.JSONField(blank=True, help_text='<picture> sources for the logo, see home.renditions.picture_data.', null=True),
+        ),
+    ]
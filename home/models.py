@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.text import slugify
 from django.core.cache import cache
+from django.utils.functional import cached_property
 from wagtail import blocks
 from wagtail.models import Page, Orderable
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel, InlinePanel
@@ -14,7 +15,10 @@ from .utilities import (
 from wagtailcache.cache import WagtailCacheMixin
 from home.opportunity_model import *
 from home.resource_model import *
+from home.renditions import POST_CARD_SPEC, queue_missing_renditions, image_prefetch
+from home.cache_tags import get_tagged, image_tag, page_tag, purge_epoch, tag_key, tag_request
 
+FEATURED_POSTS_CACHE_TIMEOUT = 3600
 
 
 class HomePageFeaturedPost(Orderable):
@@ -75,15 +79,62 @@ class HomePage(WagtailCacheMixin, Page):
     #     blank=True,
     # )
 
-    @property
+    @classmethod
+    def featured_posts_version_key(cls, page_id):
+        return f'version:home_page_featured_posts:{page_id}'
+
+    @classmethod
+    def invalidate_featured_posts(cls, page_ids):
+        """
+        Point the given home pages at a fresh featured posts key.
+        """
+        for page_id in set(page_ids):
+            version_key = cls.featured_posts_version_key(page_id)
+            try:
+                cache.incr(version_key)
+            except ValueError:
+                cache.set(version_key, 1, None)
+
+    def featured_posts_cache_key(self):
+        version = cache.get(self.featured_posts_version_key(self.pk), 0)
+        return f'home_page_featured_posts:{self.pk}:{version}'
+
+    @cached_property
     def featured_post_list(self):
-        cache_key = 'home_page_featured_post_list'
-        data = cache.get(cache_key)
-        if not data:
-            data = [item.post for item in self.featured_posts.all().select_related('post')]
-            cache.set(cache_key, data, 3600)
-
+        """
+        The live featured posts in panel order. Only the ordered ids are
+        cached; the posts and their card renditions come from one query.
+        """
+        cache_key = self.featured_posts_cache_key()
+        post_ids = get_tagged(cache_key)
+        if post_ids is None:
+            since = purge_epoch()
+            post_ids = list(self.featured_posts.values_list('post_id', flat=True))
+            cache.set(cache_key, post_ids, FEATURED_POSTS_CACHE_TIMEOUT)
+            tag_key(cache_key, [page_tag(self.pk), *[page_tag(pk) for pk in post_ids]], since=since)
+        if not post_ids:
+            return []
+
+        post_model = HomePageFeaturedPost._meta.get_field('post').related_model
+        posts = (
+            post_model.objects.live()
+            .prefetch_related(image_prefetch('cover_image', POST_CARD_SPEC))
+            .in_bulk(post_ids)
+        )
+        data = [posts[pk] for pk in post_ids if pk in posts]
+        queue_missing_renditions([post.cover_image for post in data], POST_CARD_SPEC)
         return data
+
+    @staticmethod
+    def featured_post_tags(posts):
+        tags = [page_tag(post.pk) for post in posts]
+        tags += [image_tag(post.cover_image_id) for post in posts if post.cover_image_id]
+        return tags
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        tag_request(request, *self.featured_post_tags(self.featured_post_list))
+        return context
     
 
     content_panels = Page.content_panels + [
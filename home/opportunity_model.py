@@ -1,8 +1,21 @@
+import functools
+import hashlib
+import json
+import re
 from home.abstract_model import AbstractBaseFilterModel
-from django.db import models
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db import models, transaction
+from django.db.models import F, Func, Value
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Q
+from django.template.loader import get_template, render_to_string
+from django.utils.html import strip_tags
+from django.utils.safestring import mark_safe
 from wagtail.models import Page
+from wagtail.search import index
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel, FieldRowPanel
 from wagtail.fields import StreamField, RichTextField
 from wagtail import blocks
@@ -27,6 +40,11 @@ from .utilities import (
 from collections import OrderedDict
 from wagtailcache.cache import WagtailCacheMixin  # Add this to class for caching 
 from home.abstract_model import AbstractBaseFilterModel
+from home.cache_tags import children_tag, page_tag, tag_request, taxonomy_tag
+from home.facet_index import get_program_facet_index
+from home.pagination import paginate_ids
+from home.vocabulary import term_names, terms
+from home.renditions import PROGRAM_LOGO_SPEC, image_prefetch, picture_data, picture_specs
 
 YES_NO_CHOICES = [
     ("Yes", "Yes"),
@@ -301,6 +319,12 @@ class Program(WagtailCacheMixin, Page):
         default="pending"
     )
 
+    search_fields = Page.search_fields + [
+        index.SearchField('provider', boost=1.5),
+        index.SearchField('program_summary'),
+        index.SearchField('program_overview'),
+    ]
+
     # --- Content Panels ---
     content_panels = Page.content_panels + [
         MultiFieldPanel(
@@ -422,8 +446,8 @@ class Program(WagtailCacheMixin, Page):
 
     def save(self, clean=True, user=None, log_action=False, **kwargs):
         if self.pk:
-            old_page = Page.objects.get(pk=self.pk).specific
-            was_live = old_page.live
+            # Only the stored live flag is needed, not the whole specific page.
+            was_live = bool(Page.objects.filter(pk=self.pk).values_list('live', flat=True).first())
         else:
             was_live = False
         is_live = self.live
@@ -441,79 +465,354 @@ class Program(WagtailCacheMixin, Page):
     # Override get_context to fetch all live opportunities for initial load (optional)
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
-        # helper to join M2M names
+        snapshot = None
+        if not getattr(request, 'is_preview', False):
+            snapshot = (
+                ProgramSearchDocument.objects.filter(pk=self.pk)
+                .values_list('essential_info', 'index_url')
+                .first()
+            )
+        if snapshot and snapshot[0] is not None:
+            essential_info, context['index_url'] = snapshot
+        else:
+            # Previews show the draft, so they build the rows from the page itself.
+            essential_info = self.build_essential_info()
+
+        context['essential_info'] = OrderedDict(essential_info)
+        return context
+
+
+    def build_essential_info(self):
+        """
+        The "Essential Information" rows as [label, {"value", "field"}] pairs.
+        It's a list rather than a dict because jsonb doesn't keep key order.
+        Snapshotted onto ProgramSearchDocument at publish time.
+        """
+        # helper to join M2M names; .all() is served by a prefetch or by the
+        # in-memory relations of a revision
         def get_m2m_names(manager):
-            return ", ".join([obj.name for obj in manager.all()]) if manager.exists() else "Varies/N/A"
+            names = [obj.name for obj in manager.all()]
+            return ", ".join(names) if names else "Varies/N/A"
 
         # Mapping mockup labels to model fields
-        essential_info = OrderedDict([
-            ("Program type", {
+        return [
+            ["Program type", {
                 "value": get_m2m_names(self.program_types),
                 "field": "program_types"
-            }),
-            ("Program delivery", {
+            }],
+            ["Program delivery", {
                 "value": get_m2m_names(self.program_delivery),
                 "field": "program_delivery"
-            }),
-            ("Location", {
+            }],
+            ["Location", {
                 "value": get_m2m_names(self.locations),
                 "field": "locations"
-            }),
-            ("NYC Neighborhood", {
+            }],
+            ["NYC Neighborhood", {
                 "value": get_m2m_names(self.nyc_neighborhood),
                 "field": "nyc_neighborhood"
-            }),
-            ("Topics", {
+            }],
+            ["Topics", {
                 "value": get_m2m_names(self.focus_topics),
                 "field": "focus_topics"
-            }),
-            ("Session Starts", {
+            }],
+            ["Session Starts", {
                 "value": get_m2m_names(self.session_start),
                 "field": "session_start"
-            }),
-            ("Session length", {
+            }],
+            ["Session length", {
                 "value": get_m2m_names(self.session_length),
                 "field": "session_length"
-            }),
-            ("Ages", {
+            }],
+            ["Ages", {
                 "value": get_m2m_names(self.age_groups),
                 "field": "age_groups"
-            }),
-            ("Gender", {
+            }],
+            ["Gender", {
                 "value": get_m2m_names(self.gender),
                 "field": "gender"
-            }),
-            ("Selective", {
+            }],
+            ["Selective", {
                 "value": self.get_application_selective_display() if self.application_selective else "Varies",
                 "field": "application_selective"
-            }),
-            ("Application Deadline", {
+            }],
+            ["Application Deadline", {
                 "value": self.application_deadline.strftime("%B %d, %Y") if self.application_deadline else "Rolling/N/A",
                 "field": "application_deadline"
-            }),
-            ("Cost", {
+            }],
+            ["Cost", {
                 "value": self.cost if self.cost else "Varies/N/A",
                 "field": "cost"
-            }),
-            ("Scholarships/Financial Aid", {
+            }],
+            ["Scholarships/Financial Aid", {
                 "value": self.scholarship_fin_aid if self.scholarship_fin_aid else "Contact for details",
                 "field": "scholarship_fin_aid"
-            }),
-            ("Accreditation", {
+            }],
+            ["Accreditation", {
                 "value": self.accreditation if self.accreditation else "N/A",
                 "field": "accreditation"
-            }),
-            ("Years in Business", {
+            }],
+            ["Years in Business", {
                 "value": self.years_in_business if self.years_in_business else "N/A",
                 "field": "years_in_business"
-            }),
-        ])
+            }],
+        ]
 
-        context['essential_info'] = essential_info
-        return context
 
 
 
+PROGRAM_SEARCH_CONFIG = 'english'
+
+# Ranked search results are cached per query signature; the key carries the
+# facet index version, which every publish / taxonomy change bumps.
+PROGRAM_RESULTS_CACHE_TIMEOUT = 600
+
+# Result cards are cached one per program under a versioned key (see
+# ProgramSearchDocument.card_cache_key), so they can live for a day. The key
+# also carries a hash of the card templates, so a deploy that changes the
+# markup starts from fresh cards.
+PROGRAM_CARD_TEMPLATE = 'home/blocks/program_card.html'
+PROGRAM_CARD_TEMPLATES = (PROGRAM_CARD_TEMPLATE, 'home/blocks/picture.html')
+PROGRAM_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@functools.cache
+def program_card_template_version():
+    """
+    Short hash of the source of PROGRAM_CARD_TEMPLATES, once per process.
+    """
+    source = ''.join(get_template(name).template.source for name in PROGRAM_CARD_TEMPLATES)
+    return hashlib.md5(source.encode()).hexdigest()[:8]
+
+PROGRAM_FACET_FIELDS = [
+    'program_types',
+    'program_delivery',
+    'focus_topics',
+    'locations',
+    'nyc_neighborhood',
+    'session_start',
+    'session_length',
+    'age_groups',
+    'gender',
+    'fees_category',
+]
+
+
+def facet_slug_array():
+    return ArrayField(models.CharField(max_length=255), default=list, blank=True)
+
+
+class ProgramSearchDocument(models.Model):
+    """
+    Flat copy of a live Program for the listing page and its AJAX fragment.
+    Written in the publish transaction and dropped on unpublish, so a result
+    list is one primary key scan with no page tree or through table joins.
+    """
+    program = models.OneToOneField(
+        'home.Program',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    path = models.CharField(max_length=255, db_index=True)
+    url = models.CharField(max_length=255, blank=True)
+    title = models.CharField(max_length=255)
+    summary = models.TextField(blank=True)
+    city = models.CharField(max_length=100, blank=True)
+    state = models.CharField(max_length=50, blank=True)
+    website = models.URLField(max_length=255, blank=True)
+    is_exceptional = models.BooleanField(default=False)
+    application_deadline = models.DateField(null=True, blank=True)
+    logo_url = models.CharField(max_length=255, blank=True)
+    logo_picture = models.JSONField(null=True, blank=True, help_text="<picture> sources for the logo, see home.renditions.picture_data.")
+    last_published_at = models.DateTimeField(null=True, blank=True)
+    provider = models.CharField(max_length=255, blank=True)
+    overview = models.TextField(blank=True, help_text="Plain text of the program overview, for search.")
+    essential_info = models.JSONField(null=True, editable=False, help_text="Snapshot of the detail page's Essential Information rows.")
+    index_url = models.CharField(max_length=255, blank=True, help_text="URL of the parent listing, for the breadcrumb.")
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    program_types = facet_slug_array()
+    program_delivery = facet_slug_array()
+    focus_topics = facet_slug_array()
+    locations = facet_slug_array()
+    nyc_neighborhood = facet_slug_array()
+    session_start = facet_slug_array()
+    session_length = facet_slug_array()
+    age_groups = facet_slug_array()
+    gender = facet_slug_array()
+    fees_category = facet_slug_array()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=[facet], name=f'progdoc_{facet}_gin')
+            for facet in PROGRAM_FACET_FIELDS
+        ] + [
+            GinIndex(fields=['search_vector'], name='progdoc_search_vector_gin'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def card_cache_key(self):
+        """
+        Changes when the program is republished, its logo renditions land,
+        its URL moves or the card templates change, so a stale card is never
+        served and nothing else is invalidated with it.
+        """
+        version = json.dumps([
+            program_card_template_version(),
+            self.last_published_at.isoformat() if self.last_published_at else None,
+            self.url,
+            self.logo_picture or self.logo_url,
+        ])
+        return f'program_card:{self.pk}:{hashlib.md5(version.encode()).hexdigest()}'
+
+    @classmethod
+    def render_cards(cls, documents):
+        """
+        Set ``card_html`` on each document: one ``get_many`` for the cached
+        cards, and only the misses are rendered and stored.
+        """
+        keys = {document.card_cache_key(): document for document in documents}
+        cards = cache.get_many(keys)
+        missing = {
+            key: render_to_string(PROGRAM_CARD_TEMPLATE, {'program': document})
+            for key, document in keys.items()
+            if key not in cards
+        }
+        if missing:
+            cache.set_many(missing, PROGRAM_CARD_CACHE_TIMEOUT)
+            cards.update(missing)
+        for key, document in keys.items():
+            document.card_html = mark_safe(cards[key])
+        return documents
+
+    @classmethod
+    def values_for(cls, program):
+        parent = program.get_parent()
+        logo_url, logo_picture = '', None
+        if program.logo_image:
+            # The original until the background renditions exist (see home.tasks).
+            logo_picture = picture_data(program.logo_image, PROGRAM_LOGO_SPEC)
+            logo_url = logo_picture['src']
+
+        values = {
+            'path': program.path,
+            'url': program.get_url() or '',
+            'title': program.title,
+            'summary': program.program_summary or '',
+            'city': program.city or '',
+            'state': program.state or '',
+            'website': program.website or '',
+            'is_exceptional': program.is_exceptional,
+            'application_deadline': program.application_deadline,
+            'logo_url': logo_url,
+            'logo_picture': logo_picture,
+            'last_published_at': program.last_published_at,
+            'provider': program.provider or '',
+            'overview': strip_tags(program.program_overview or ''),
+            'essential_info': program.build_essential_info(),
+            'index_url': (parent.get_url() or '') if parent else '',
+        }
+        for facet in PROGRAM_FACET_FIELDS:
+            values[facet] = sorted(obj.slug for obj in getattr(program, facet).all())
+        return values
+
+    @classmethod
+    def refresh(cls, program):
+        """
+        Write (or drop) the document for a single program.
+        """
+        with transaction.atomic():
+            if not program.live:
+                cls.objects.filter(program_id=program.pk).delete()
+                return None
+            document, created = cls.objects.update_or_create(
+                program_id=program.pk,
+                defaults=cls.values_for(program),
+            )
+            cls.objects.filter(pk=program.pk).update(search_vector=cls.weighted_vector())
+        return document
+
+    @staticmethod
+    def weighted_vector():
+        """
+        Title > provider > summary > overview.
+        """
+        return (
+            SearchVector('title', weight='A', config=PROGRAM_SEARCH_CONFIG)
+            + SearchVector('provider', weight='B', config=PROGRAM_SEARCH_CONFIG)
+            + SearchVector('summary', weight='C', config=PROGRAM_SEARCH_CONFIG)
+            + SearchVector('overview', weight='D', config=PROGRAM_SEARCH_CONFIG)
+        )
+
+    @classmethod
+    def search_ids(cls, search_query, scope=None):
+        """
+        Ids of the documents matching ``search_query``, best ranked first.
+        """
+        query = SearchQuery(search_query, search_type='websearch', config=PROGRAM_SEARCH_CONFIG)
+        documents = cls.objects.filter(search_vector=query)
+        if scope:
+            documents = documents.filter(path__startswith=scope)
+        return list(
+            documents.annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', 'pk')
+            .values_list('pk', flat=True)
+        )
+
+    @classmethod
+    def autocomplete(cls, prefix, limit=8):
+        """
+        Title / provider suggestions for a partly typed query. Every word is
+        matched as a prefix against the A and B weighted lexemes only, so this
+        stays on the search_vector GIN index.
+        """
+        words = [re.sub(r'[^\w]', '', word) for word in prefix.split()]
+        words = [word for word in words if word]
+        if not words:
+            return []
+        query = SearchQuery(
+            ' & '.join(f'{word}:*AB' for word in words),
+            search_type='raw',
+            config=PROGRAM_SEARCH_CONFIG,
+        )
+        return list(
+            cls.objects.filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', 'title')
+            .values('title', 'provider', 'url')[:limit]
+        )
+
+    @classmethod
+    def rebuild(cls, programs=None):
+        """
+        Rewrite the documents for ``programs`` (all programs by default).
+        """
+        if programs is None:
+            programs = Program.objects.all()
+        programs = programs.prefetch_related(
+            image_prefetch('logo_image', *picture_specs(PROGRAM_LOGO_SPEC)),
+            *PROGRAM_FACET_FIELDS,
+        )
+        count = 0
+        with transaction.atomic():
+            for program in programs.iterator(chunk_size=200):
+                if cls.refresh(program):
+                    count += 1
+        return count
+
+    @classmethod
+    def remove_option(cls, facet, slug):
+        """
+        Drop a deleted taxonomy option from the documents that carry it.
+        """
+        cls.objects.filter(**{f'{facet}__contains': [slug]}).update(
+            **{facet: Func(F(facet), Value(slug), function='array_remove')}
+        )
+
+
 class ProgramIntroBlock(blocks.StructBlock):
     """
     A block for alternating image/text feature sections used on the HomePage.
@@ -572,67 +871,61 @@ class ProgramIndexPage(Page):
          'program_types' : {
             'title' : 'type of program',
             'field' : 'program_types__slug',
-            'data' : ProgramType.objects.all().order_by('name'),
+            'model' : ProgramType,
             'multiselect' : True
         },
         'program_delivery' : {
             'title' : 'program delivery',
             'field' : 'program_delivery__slug',
-            'data' : ProgramDelivery.objects.all().order_by('name'),
+            'model' : ProgramDelivery,
             'multiselect' : True
         },
         'focus_topics' : {
             'title' : 'topics',
             'field' : 'focus_topics__slug',
-            'data' : FocusTopic.objects.all().order_by('name'),
+            'model' : FocusTopic,
             'multiselect' : True
         },
         'locations' : {
             'title' : 'location',
             'field' : 'locations__slug',
-            'data' : ProgramLocation.objects.all().order_by('name'),
+            'model' : ProgramLocation,
             'multiselect' : True
         },
         'nyc_neighborhood' : {
             'title' : 'nyc neighborhood',
             'field' : 'nyc_neighborhood__slug',
-            'data' : NYCNeighborhood.objects.all().order_by('name'),
+            'model' : NYCNeighborhood,
             'multiselect' : True
         },
         'session_start' : {
             'title' : 'session start',
             'field' : 'session_start__slug',
-            'data' : SessionStart.objects.all().order_by('name'),
+            'model' : SessionStart,
             'multiselect' : True
         },
         'session_length' : {
             'title' : 'session length',
             'field' : 'session_length__slug',
-            'data' : SessionLength.objects.all().order_by('name'),
+            'model' : SessionLength,
             'multiselect' : True
         },
         'age_groups' : {
             'title' : 'ages',
             'field' : 'age_groups__slug',
-            'data' : AgeGroup.objects.all().order_by('name'),
+            'model' : AgeGroup,
             'multiselect' : True
         },
         'gender' : {
             'title' : 'gender',
             'field' : 'gender__slug',
-            'data' : GenderFilter.objects.all().order_by('name'),
+            'model' : GenderFilter,
             'multiselect' : True
         },
         'fees_category' : {
             'title' : 'fees',
             'field' : 'fees_category__slug',
-            'data' : FeesCategory.objects.all().order_by('name'),
-            'multiselect' : True
-        },
-        'selectivity' : {
-            'title' : 'selective',
-            'field' : 'selectivity__slug',
-            'data' : Selectivity.objects.all().order_by('name'),
+            'model' : FeesCategory,
             'multiselect' : True
         },
     })
@@ -689,60 +982,149 @@ class ProgramIndexPage(Page):
         return super().serve(request, *args, **kwargs)
     
     
+    def search_ids(self, search_query, mode=None):
+        """
+        Run the full-text search once and return the matching program ids,
+        best match first, without loading the Program rows.
+
+        The default "postgres" mode ranks against the weighted tsvector stored
+        on ProgramSearchDocument; "wagtail" goes through WAGTAILSEARCH_BACKENDS.
+        """
+        mode = mode or getattr(settings, 'PROGRAM_SEARCH_MODE', 'postgres')
+        if mode == 'postgres':
+            return ProgramSearchDocument.search_ids(search_query, scope=self.path)
+
+        search_results = Program.objects.live().descendant_of(self).search(search_query)
+        if hasattr(search_results, 'get_queryset'):
+            return list(search_results.get_queryset().values_list('pk', flat=True))
+        return [obj.pk for obj in search_results]
+
+
+    def selected_filters_for(self, params):
+        """
+        Facet selections from a QueryDict; single-select facets keep the first value.
+        """
+        selected_filters = {}
+        for param_name, config in self.PROGRAM_FILTERS.items():
+            param_values = [v for v in params.getlist(param_name) if v]
+            if not param_values:
+                continue
+            if not config.get('multiselect', False):
+                param_values = param_values[:1]
+            selected_filters[param_name] = param_values
+        return selected_filters
+
+
+    @classmethod
+    def program_filters(cls):
+        """
+        PROGRAM_FILTERS with each filter's ``data``: its terms from the
+        process-local vocabulary (see home.vocabulary).
+        """
+        return OrderedDict(
+            (facet, {**config, 'data': terms(config['model'])})
+            for facet, config in cls.PROGRAM_FILTERS.items()
+        )
+
+
+    def active_filter_badges(self, selected_filters, params):
+        """
+        ``(facet, slug, name, remove querystring)`` for each selected option,
+        one dictionary lookup apiece.
+        """
+        badges = []
+        for facet, slugs in selected_filters.items():
+            facet_names = term_names(self.PROGRAM_FILTERS[facet]['model'])
+            for slug in slugs:
+                remaining = params.copy()
+                remaining.setlist(facet, [value for value in params.getlist(facet) if value != slug])
+                for key in ('after', 'before', 'page'):
+                    remaining.pop(key, None)
+                badges.append((facet, slug, facet_names.get(slug, slug), remaining.urlencode()))
+        return badges
+
+
+    def search_programs(self, search_query, selected_filters):
+        """
+        Search-then-filter pipeline. The search (if any) runs a single query
+        for ranked ids, which are then intersected in memory with the facet
+        bitsets, so selecting more facets doesn't add queries.
+
+        Returns the ordered program ids and the facet option counts.
+        """
+        facet_index = get_program_facet_index()
+        cache_key = None
+        if search_query:
+            # Without a query everything comes from the in-memory bitsets, which
+            # is cheaper than a cache round trip.
+            cache_key = f'program_results:{facet_index.version}:{self.search_signature(search_query, selected_filters)}'
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        matches = facet_index.filter(selected_filters, scope=self.path)
+
+        if search_query:
+            search_ids = self.search_ids(search_query)
+            search_mask = facet_index.mask_of(search_ids)
+            # Keep the relevance order of the search backend.
+            opportunities = [pk for pk in search_ids if facet_index.contains(matches, pk)]
+        else:
+            search_mask = None
+            opportunities = facet_index.results(matches)
+
+        facet_counts = facet_index.facet_counts(selected_filters, scope=self.path, within=search_mask)
+        if cache_key:
+            cache.set(cache_key, (opportunities, facet_counts), PROGRAM_RESULTS_CACHE_TIMEOUT)
+        return opportunities, facet_counts
+
+
+    def search_signature(self, search_query, selected_filters):
+        """
+        Canonical digest of a search: case and whitespace of ``q`` and the
+        order of GET parameters don't produce different signatures.
+        """
+        signature = [
+            self.pk,
+            ' '.join(search_query.lower().split()),
+            sorted((facet, sorted(set(values))) for facet, values in selected_filters.items() if values),
+        ]
+        return hashlib.md5(json.dumps(signature).encode()).hexdigest()
+
+
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
-        opportunities = Program.objects.descendant_of(self).live()
         search_query = request.GET.get('q', '').strip()
         get_params = request.GET
-        selected_filters = {}
-
-        if search_query:
-            opportunities = opportunities.search(search_query)
-        
-        for param_name, config in self.PROGRAM_FILTERS.items():
-            param_values = get_params.getlist(param_name) 
-            
-            if param_values:
-                param_values = [v for v in param_values if v]
-                if not param_values:
-                    continue
-
-                selected_filters[param_name] = param_values
-                if search_query and hasattr(opportunities, 'get_queryset'):
-                    program_ids = [obj.pk for obj in opportunities]
-                    opportunities = Program.objects.filter(pk__in=program_ids)
-                elif search_query: 
-                    program_ids = [obj.pk for obj in opportunities]
-                    opportunities = Program.objects.filter(pk__in=program_ids)
-
-                field_path = config['field']
-
-                if config.get('multiselect', False):
-                    filter_key = f"{field_path}__in"
-                    opportunities = opportunities.filter(**{filter_key: param_values}).distinct()
-                else:
-                    filter_key = field_path
-                    opportunities = opportunities.filter(**{filter_key: param_values[0]})
-        
-        page_num = get_params.get('page', 1)
-        paginator = Paginator(opportunities, 5) 
-
-        try:
-            paginated_opportunities = paginator.page(page_num)
-        except PageNotAnInteger:
-            
-            paginated_opportunities = paginator.page(1)
-        except EmptyPage:
-            paginated_opportunities = paginator.page(paginator.num_pages)
+        selected_filters = self.selected_filters_for(get_params)
+
+        opportunities, facet_counts = self.search_programs(search_query, selected_filters)
+
+        paginated_opportunities = paginate_ids(opportunities, 5, get_params)
+        program_ids = list(paginated_opportunities.object_list)
+        programs = ProgramSearchDocument.objects.in_bulk(program_ids)
+        paginated_opportunities.object_list = ProgramSearchDocument.render_cards(
+            [programs[pk] for pk in program_ids if pk in programs]
+        )
+        # The cards, the sidebar terms and whichever programs get published next.
+        tag_request(
+            request,
+            children_tag(self.pk),
+            *[page_tag(pk) for pk in program_ids],
+            *[taxonomy_tag(config['model']) for config in self.PROGRAM_FILTERS.values()],
+        )
             
+        active_filters = self.active_filter_badges(selected_filters, get_params)
         if search_query:
             selected_filters['q'] = search_query
             
         context.update({
             'search_query': search_query,
             'opportunities': paginated_opportunities, 
-            'program_filters' : self.PROGRAM_FILTERS,
+            'program_filters' : self.program_filters(),
             'selected_filters': selected_filters, 
+            'active_filters': active_filters,
+            'facet_counts': facet_counts,
             'form_action_url': self.url,
         })
             
@@ -0,0 +1,242 @@
+"""
+Keyset ("cursor") pagination for the program and resource listings.
+
+Pages are addressed by opaque ``after`` / ``before`` tokens that encode the
+sort key of the last (or first) row shown, so a deep page costs the same as
+the first one and crawlers can't fan out over ``?page=N``. Totals come from
+a short-lived cached count rather than a COUNT per page render.
+"""
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import QueryDict
+
+COUNT_CACHE_TIMEOUT = 300  # seconds
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Sort key values for an opaque token; raises ValueError for anything we didn't issue.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError(token)
+    if not isinstance(values, list) or not values:
+        raise ValueError(token)
+    return values
+
+
+class KeysetPage:
+    """
+    One page of results plus the tokens for its neighbours. Quacks enough
+    like a Django Page for the templates: ``object_list``, ``has_next``,
+    ``has_previous`` and ``has_other_pages``.
+    """
+    keyset = True
+
+    def __init__(self, object_list, count, next_cursor=None, previous_cursor=None, params=None):
+        self.object_list = object_list
+        self.count = count
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _querystring(self, name, cursor):
+        params = self.params.copy() if self.params is not None else QueryDict(mutable=True)
+        for key in ('after', 'before', 'page'):
+            params.pop(key, None)
+        params[name] = cursor
+        return params.urlencode()
+
+    def next_querystring(self):
+        return self._querystring('after', self.next_cursor) if self.next_cursor else ''
+
+    def previous_querystring(self):
+        return self._querystring('before', self.previous_cursor) if self.previous_cursor else ''
+
+
+def cursor_params(params, clean=None):
+    """
+    ``(after, before)`` sort keys from a QueryDict; bad tokens restart at the first page.
+    ``clean`` checks a decoded key against the ordering in use and raises
+    ValueError for one that doesn't fit (e.g. a cursor from another listing).
+    """
+    try:
+        after = decode_cursor(params['after']) if params.get('after') else None
+        before = decode_cursor(params['before']) if params.get('before') else None
+        if clean is not None:
+            after = clean(after) if after is not None else None
+            before = clean(before) if before is not None else None
+    except ValueError:
+        return None, None
+    return after, None if after else before
+
+
+def _ordering_cleaner(model, ordering):
+    """
+    Cursor check for a queryset sorted by ``ordering``: one non-null scalar
+    per field, converted with the field's ``to_python``.
+    """
+    fields = [model._meta.pk if name == 'pk' else model._meta.get_field(name) for name in ordering]
+
+    def clean(values):
+        if len(values) != len(fields):
+            raise ValueError(values)
+        cleaned = []
+        for field, value in zip(fields, values):
+            if value is None or isinstance(value, (list, dict)):
+                raise ValueError(values)
+            try:
+                cleaned.append(field.to_python(value))
+            except ValidationError:
+                raise ValueError(values)
+        return cleaned
+
+    return clean
+
+
+def _clean_id_cursor(values):
+    """
+    Cursor check for ``paginate_ids``: a single integer id.
+    """
+    if len(values) != 1 or type(values[0]) is not int:
+        raise ValueError(values)
+    return values
+
+
+def _keyset_q(ordering, values, forward):
+    """
+    ``(a, b, c) > (x, y, z)`` spelled out as ORs, for ascending ``ordering``.
+    """
+    lookup = 'gt' if forward else 'lt'
+    condition = Q()
+    for depth, field in enumerate(ordering):
+        step = Q(**{f'{field}__{lookup}': values[depth]})
+        for previous, value in zip(ordering[:depth], values):
+            step &= Q(**{previous: value})
+        condition |= step
+    return condition
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """
+    COUNT for ``queryset``, cached by its SQL for a few minutes.
+    """
+    sql, sql_params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{sql_params!r}'.encode()).hexdigest()
+    key = f'keyset_count:{queryset.model._meta.label_lower}:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def paginate_queryset(queryset, ordering, per_page, params):
+    """
+    Keyset page of ``queryset`` sorted ascending by ``ordering``, which must
+    end in a unique field (normally ``pk``).
+    """
+    ordering = list(ordering)
+    after, before = cursor_params(params, _ordering_cleaner(queryset.model, ordering))
+    count = cached_count(queryset)
+
+    if before is not None:
+        rows = list(
+            queryset.filter(_keyset_q(ordering, before, forward=False))
+            .order_by(*[f'-{field}' for field in ordering])[:per_page + 1]
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next, has_previous = True, has_more
+    else:
+        if after is not None:
+            queryset = queryset.filter(_keyset_q(ordering, after, forward=True))
+        rows = list(queryset.order_by(*ordering)[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after is not None
+
+    def key_of(row):
+        return [getattr(row, field) for field in ordering]
+
+    return KeysetPage(
+        rows,
+        count,
+        next_cursor=encode_cursor(key_of(rows[-1])) if rows and has_next else None,
+        previous_cursor=encode_cursor(key_of(rows[0])) if rows and has_previous else None,
+        params=params,
+    )
+
+
+def paginate_ids(ids, per_page, params):
+    """
+    Keyset page of an already ordered sequence of program ids: a list, or a
+    FacetResult, which can jump straight to a key without walking the rows
+    before it. The cursor is the id of the boundary row.
+    """
+    after, before = cursor_params(params, _clean_id_cursor)
+    count = len(ids)
+    if not hasattr(ids, 'after'):
+        ids = _IdList(ids)
+
+    if before is not None:
+        page_ids = ids.before(before[0]).last(per_page + 1)
+        has_previous = len(page_ids) > per_page
+        page_ids = page_ids[-per_page:]
+        has_next = True
+    else:
+        following = ids.after(after[0]) if after is not None else ids
+        page_ids = list(following[:per_page + 1])
+        has_next = len(page_ids) > per_page
+        page_ids = page_ids[:per_page]
+        has_previous = after is not None
+
+    return KeysetPage(
+        page_ids,
+        count,
+        next_cursor=encode_cursor([page_ids[-1]]) if page_ids and has_next else None,
+        previous_cursor=encode_cursor([page_ids[0]]) if page_ids and has_previous else None,
+        params=params,
+    )
+
+
+class _IdList(list):
+    """
+    The FacetResult cursor interface over a plain list of ids (search results).
+    """
+
+    def after(self, pk):
+        return _IdList(self[self.index(pk) + 1:]) if pk in self else self
+
+    def before(self, pk):
+        return _IdList(self[:self.index(pk)]) if pk in self else _IdList()
+
+    def last(self, n):
+        return self[-n:] if n else []
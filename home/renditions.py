@@ -0,0 +1,206 @@
+"""
+Image / rendition loading for our templates.
+
+``{% image %}`` on an image without prefetched renditions costs a cache or
+database lookup per tag, plus a synchronous resize when the rendition has
+never been generated. Listing contexts instead prefetch the images and the
+renditions their template needs (two queries for the whole page).
+
+Resizing never happens in a request: renditions are queued for the
+``renditions`` task backend the first time a template asks for them, and
+``{% rendition_or_original %}`` serves the original file until the worker
+has caught up. Replacing the file of an image that is in use queues the
+renditions of the slots it is used in straight away (see ``home.signals``).
+"""
+import re
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Prefetch
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+
+# Filter specs used by the listing templates, kept next to each other so the
+# prefetch and the {% image %} tag can't drift apart.
+PROGRAM_LOGO_SPEC = 'width-300'
+RESOURCE_IMAGE_SPEC = 'width-150|height-200'
+RESOURCE_CATEGORY_LOGO_SPEC = 'width-160'
+POST_CARD_SPEC = 'width-300'
+PROGRAM_DETAIL_LOGO_SPEC = 'width-400'
+FOUNDER_IMAGE_SPEC = 'width-200'
+HERO_IMAGE_SPEC = 'fill-1920x800'
+FEATURE_IMAGE_SPECS = ('fill-400x300', 'fill-500x400')
+
+# <picture> output: modern formats first, each over a width ladder relative
+# to the base spec (half size for small screens, double for HiDPI).
+PICTURE_FORMATS = (('avif', 'image/avif'), ('webp', 'image/webp'))
+PICTURE_SCALES = (0.5, 1, 2)
+
+
+def scale_spec(spec, factor):
+    """
+    'width-300|format-webp' scaled by 2 -> 'width-600|format-webp'.
+    """
+    if factor == 1:
+        return spec
+    return re.sub(
+        r'\b(width|height|max|min|fill)-(\d+)(?:x(\d+))?',
+        lambda m: f"{m[1]}-{round(int(m[2]) * factor)}" + (f"x{round(int(m[3]) * factor)}" if m[3] else ''),
+        spec,
+    )
+
+
+def picture_specs(base_spec):
+    """
+    Every rendition a <picture> for ``base_spec`` can use: the ladder in the
+    original format, then the ladder in each of PICTURE_FORMATS.
+    """
+    ladder = [scale_spec(base_spec, factor) for factor in PICTURE_SCALES]
+    return ladder + [f'{spec}|format-{fmt}' for fmt, _ in PICTURE_FORMATS for spec in ladder]
+
+
+# The image foreign keys our templates render and the renditions each one
+# uses, so a replaced file only regenerates what is actually shown. Images in
+# StreamField blocks (the feature blocks) are left to on-demand queueing.
+IMAGE_FIELD_SPECS = {
+    ('home', 'Program', 'logo_image'): (
+        *picture_specs(PROGRAM_LOGO_SPEC),
+        *picture_specs(PROGRAM_DETAIL_LOGO_SPEC),
+    ),
+    ('home', 'Resource', 'image'): tuple(picture_specs(RESOURCE_IMAGE_SPEC)),
+    ('home', 'ResourceCategory', 'logo'): tuple(picture_specs(RESOURCE_CATEGORY_LOGO_SPEC)),
+    ('cast', 'Post', 'cover_image'): (POST_CARD_SPEC,),
+    ('home', 'AboutPage', 'founder_image'): (FOUNDER_IMAGE_SPEC,),
+    ('home', 'HomePage', 'hero_image'): (HERO_IMAGE_SPEC,),
+    ('home', 'GuidancePage', 'hero_image'): (HERO_IMAGE_SPEC,),
+    ('home', 'ProgramIndexPage', 'hero_image'): (HERO_IMAGE_SPEC,),
+    ('home', 'ResourceIndexPage', 'hero_image'): (HERO_IMAGE_SPEC,),
+}
+PENDING_TIMEOUT = 600  # seconds before a lost job can be queued again
+
+
+class OriginalImage:
+    """
+    Stands in for a rendition that is still being generated: the template
+    gets the original file under the same attribute names.
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self.url = image.file.url
+        self.width = image.width
+        self.height = image.height
+        self.alt = getattr(image, 'default_alt_text', image.title)
+
+    @property
+    def full_url(self):
+        return self.url
+
+
+def image_prefetch(lookup, *filter_specs):
+    """
+    Prefetch for an image foreign key that also brings the renditions for
+    ``filter_specs``, e.g. ``queryset.prefetch_related(image_prefetch('logo', 'width-160'))``.
+    """
+    return Prefetch(lookup, queryset=get_image_model().objects.prefetch_renditions(*filter_specs))
+
+
+def missing_renditions(images, *filter_specs):
+    """
+    ``{image: [filter spec, ...]}`` for renditions not among those prefetched.
+    """
+    filters = [Filter(spec=spec) for spec in filter_specs]
+    missing = {}
+    for image in images:
+        if image is None or image in missing:
+            continue
+        found = image.find_existing_renditions(*filters)
+        absent = [f.spec for f in filters if f not in found]
+        if absent:
+            missing[image] = absent
+    return missing
+
+
+def used_rendition_specs(image):
+    """
+    The renditions of ``image`` that the places it is used in will ask for.
+    """
+    specs = set()
+    for (app_label, model_name, field_name), field_specs in IMAGE_FIELD_SPECS.items():
+        model = apps.get_model(app_label, model_name)
+        if model._default_manager.filter(**{field_name: image}).exists():
+            specs.update(field_specs)
+    return sorted(specs)
+
+
+def schedule_renditions(image, filter_specs):
+    """
+    Queue background generation of ``filter_specs`` for ``image``. The
+    pending marker (per file hash) stops a busy page from queueing the same
+    work once per request.
+    """
+    from home.tasks import generate_renditions
+
+    specs = [
+        spec for spec in filter_specs
+        if cache.add(f'rendition_pending:{image.pk}:{image.file_hash}:{spec}', True, PENDING_TIMEOUT)
+    ]
+    if specs:
+        generate_renditions.enqueue(image.pk, specs)
+    return specs
+
+
+def queue_missing_renditions(images, *filter_specs):
+    """
+    Queue the renditions missing from the prefetched set before rendering.
+    """
+    for image, specs in missing_renditions(images, *filter_specs).items():
+        schedule_renditions(image, specs)
+
+
+def rendition_or_original(image, filter_spec):
+    """
+    The rendition when it exists; otherwise queue it and return the original.
+    """
+    found = image.find_existing_renditions(Filter(spec=filter_spec))
+    if found:
+        return next(iter(found.values()))
+    schedule_renditions(image, [filter_spec])
+    return OriginalImage(image)
+
+
+def picture_data(image, base_spec):
+    """
+    Everything a <picture> for ``image`` needs, as plain data so it can also be
+    stored on ProgramSearchDocument: the fallback ``src`` with its intrinsic
+    ``width`` / ``height``, its ``srcset``, and one ``sources`` entry per
+    modern format. Renditions that don't exist yet are queued and left out.
+    """
+    specs = picture_specs(base_spec)
+    existing = image.find_existing_renditions(*[Filter(spec=spec) for spec in specs])
+    found = {f.spec: rendition for f, rendition in existing.items()}
+    missing = [spec for spec in specs if spec not in found]
+    if missing:
+        schedule_renditions(image, missing)
+
+    def srcset(suffix=''):
+        widths = {}
+        for factor in PICTURE_SCALES:
+            rendition = found.get(scale_spec(base_spec, factor) + suffix)
+            if rendition is not None:
+                widths.setdefault(rendition.width, rendition.url)
+        return ', '.join(f'{url} {width}w' for width, url in sorted(widths.items()))
+
+    fallback = found.get(base_spec) or OriginalImage(image)
+    sources = []
+    for fmt, mime_type in PICTURE_FORMATS:
+        format_srcset = srcset(f'|format-{fmt}')
+        if format_srcset:
+            sources.append({'type': mime_type, 'srcset': format_srcset})
+    return {
+        'src': fallback.url,
+        'width': fallback.width,
+        'height': fallback.height,
+        'srcset': srcset(),
+        'sources': sources,
+    }
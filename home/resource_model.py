@@ -1,10 +1,18 @@
 from wagtail.admin.panels import HelpPanel
 from wagtail.fields import RichTextField
 from home.abstract_model import AbstractBaseFilterModel
+from home.cache_tags import image_tag, model_tag, tag_request, taxonomy_tag
 from modelcluster.fields import ParentalKey, ParentalManyToManyField
 from modelcluster.models import ClusterableModel
 from django.db import models
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from home.pagination import paginate_queryset
+from home.renditions import (
+    RESOURCE_CATEGORY_LOGO_SPEC,
+    RESOURCE_IMAGE_SPEC,
+    queue_missing_renditions,
+    image_prefetch,
+    picture_specs,
+)
 from wagtailcache.cache import WagtailCacheMixin
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.models import Page
@@ -145,7 +153,16 @@ class ResourceIndexPage(WagtailCacheMixin, Page):
     def get_context(self, request):
         context = super().get_context(request)
         # Fetch all resources to display on the page
-        context['resource_categories'] = ResourceCategory.objects.all()
+        resource_categories = list(
+            ResourceCategory.objects.prefetch_related(image_prefetch('logo', *picture_specs(RESOURCE_CATEGORY_LOGO_SPEC)))
+        )
+        queue_missing_renditions([rcat.logo for rcat in resource_categories], *picture_specs(RESOURCE_CATEGORY_LOGO_SPEC))
+        tag_request(
+            request,
+            taxonomy_tag(ResourceCategory),
+            *[image_tag(rcat.logo_id) for rcat in resource_categories if rcat.logo_id],
+        )
+        context['resource_categories'] = resource_categories
         return context
     
 
@@ -172,7 +189,7 @@ class ResourceSearchResultPage(WagtailCacheMixin, Page):
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
         
-        all_resources = Resource.objects.all().prefetch_related('types', 'academic_stages')
+        all_resources = Resource.objects.all()
         get_params = request.GET
         selected_filters = {}
 
@@ -186,7 +203,9 @@ class ResourceSearchResultPage(WagtailCacheMixin, Page):
             config = self.RESOURCE_FILTERS[param_name]
             field_path = config['field']
             if config.get('multiselect', False):
-                filtered_resources = filtered_resources.filter(**{f"{field_path}__slug__in": values}).distinct()
+                # pk__in keeps the query free of DISTINCT so it can be keyset paginated.
+                matching = Resource.objects.filter(**{f"{field_path}__slug__in": values}).values('pk')
+                filtered_resources = filtered_resources.filter(pk__in=matching)
             else:
                 filtered_resources = filtered_resources.filter(**{f"{field_path}__slug": values[0]})
 
@@ -213,13 +232,20 @@ class ResourceSearchResultPage(WagtailCacheMixin, Page):
             )
         )
 
-        page_num = get_params.get('page', 1)
-        paginator = Paginator(filtered_resources, 10) 
-        
-        try:
-            paginated_resources = paginator.page(page_num)
-        except (PageNotAnInteger, EmptyPage):
-            paginated_resources = paginator.page(1)
+        paginated_resources = paginate_queryset(
+            filtered_resources.prefetch_related(image_prefetch('image', *picture_specs(RESOURCE_IMAGE_SPEC))),
+            ('name', 'pk'),
+            10,
+            get_params,
+        )
+        queue_missing_renditions([rec.image for rec in paginated_resources.object_list], *picture_specs(RESOURCE_IMAGE_SPEC))
+        tag_request(
+            request,
+            model_tag(Resource),
+            taxonomy_tag(ResourceCategory),
+            taxonomy_tag(ResourceAcademicStage),
+            *[image_tag(rec.image_id) for rec in paginated_resources.object_list if rec.image_id],
+        )
 
         context.update({
             'resources': paginated_resources, 
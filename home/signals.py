@@ -0,0 +1,223 @@
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.images import get_image_model
+from wagtail.models import Page, PageViewRestriction, Site
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+from wagtailcache.settings import wagtailcache_settings
+
+from home.abstract_model import AbstractBaseFilterModel
+from home.cache_tags import (
+    children_tag,
+    image_tag,
+    model_tag,
+    page_tag,
+    purge_tags_on_commit,
+    taxonomy_tag,
+)
+from home.context_processors import invalidate_site_nav
+from home.facet_index import invalidate_program_facet_index, update_program
+from home.models import (
+    PROGRAM_FACET_FIELDS,
+    HomePage,
+    HomePageFeaturedPost,
+    Program,
+    ProgramIndexPage,
+    ProgramSearchDocument,
+    Resource,
+)
+from home.renditions import schedule_renditions, used_rendition_specs
+from home.snapshots import (
+    invalidate_restricted_paths,
+    refresh_program_snapshots,
+    remove_program_snapshot,
+    snapshots_enabled,
+)
+from home.tasks import warm_pages
+
+
+def refresh_snapshots_on_commit(program_ids):
+    program_ids = list(program_ids)
+    if snapshots_enabled() and program_ids:
+        transaction.on_commit(lambda: refresh_program_snapshots(program_ids))
+
+
+@receiver(page_published, sender=Program)
+def program_published(sender, instance, **kwargs):
+    document = ProgramSearchDocument.refresh(instance)
+    update_program(instance.pk, document)
+    refresh_snapshots_on_commit([instance.pk])
+
+
+def invalidate_menus_of(parent_ids):
+    # Children of a site root are the candidates for the site menu.
+    if Site.objects.filter(root_page_id__in=parent_ids).exists():
+        invalidate_site_nav()
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_delete, sender=Page)
+def page_changed_purge(sender, instance, **kwargs):
+    # The page's own responses and fragments, and the listings and menus of its parent.
+    tags = [page_tag(instance.pk)]
+    parent_id = Page.objects.filter(path=instance.path[:-instance.steplen]).values_list('pk', flat=True).first()
+    if parent_id is not None:
+        tags.append(children_tag(parent_id))
+        invalidate_menus_of([parent_id])
+    purge_tags_on_commit(*tags)
+
+
+@receiver(post_page_move)
+def page_moved_purge(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    purge_tags_on_commit(
+        page_tag(instance.pk),
+        children_tag(parent_page_before.pk),
+        children_tag(parent_page_after.pk),
+    )
+    invalidate_menus_of([parent_page_before.pk, parent_page_after.pk])
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def site_changed(sender, instance, **kwargs):
+    invalidate_site_nav()
+
+
+@receiver(post_save, sender=HomePageFeaturedPost)
+@receiver(post_delete, sender=HomePageFeaturedPost)
+def featured_post_changed(sender, instance, **kwargs):
+    page_id = instance.page_id
+    transaction.on_commit(lambda: HomePage.invalidate_featured_posts([page_id]))
+    purge_tags_on_commit(page_tag(page_id))
+
+
+FEATURED_POST_MODEL = HomePageFeaturedPost._meta.get_field('post').related_model
+
+
+@receiver(page_published, sender=FEATURED_POST_MODEL)
+@receiver(page_unpublished, sender=FEATURED_POST_MODEL)
+def featured_post_published(sender, instance, **kwargs):
+    page_ids = list(HomePageFeaturedPost.objects.filter(post=instance).values_list('page_id', flat=True))
+    if page_ids:
+        transaction.on_commit(lambda: HomePage.invalidate_featured_posts(page_ids))
+
+
+@receiver(page_published)
+def page_published_rewarm(sender, instance, **kwargs):
+    # The page and the index listing it; both are re-rendered into the cache.
+    if not wagtailcache_settings.WAGTAIL_CACHE or not getattr(settings, 'WARM_CACHE_ON_PUBLISH', False):
+        return
+    page_ids = [instance.pk]
+    parent = instance.get_parent()
+    if parent is not None and not parent.is_root():
+        page_ids.append(parent.pk)
+    transaction.on_commit(lambda: warm_pages.enqueue(page_ids))
+
+
+@receiver(page_unpublished, sender=Program)
+def program_unpublished(sender, instance, **kwargs):
+    ProgramSearchDocument.refresh(instance)
+    update_program(instance.pk)
+    refresh_snapshots_on_commit([instance.pk])
+
+
+@receiver(post_delete, sender=Program)
+def program_deleted(sender, instance, **kwargs):
+    update_program(instance.pk)
+    refresh_snapshots_on_commit([instance.pk])
+
+
+@receiver(post_page_move, sender=Program)
+@receiver(post_page_move, sender=ProgramIndexPage)
+@receiver(page_slug_changed, sender=Program)
+@receiver(page_slug_changed, sender=ProgramIndexPage)
+def program_url_changed(sender, instance, **kwargs):
+    # Paths and urls are copied onto the documents, rewrite them.
+    programs = Program.objects.descendant_of(instance, inclusive=True)
+    ProgramSearchDocument.rebuild(programs)
+    invalidate_program_facet_index()
+    refresh_snapshots_on_commit(programs.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=PageViewRestriction)
+def view_restriction_saved(sender, instance, **kwargs):
+    # Stop serving the snapshots below the page now; a rollback only costs a re-render.
+    invalidate_restricted_paths()
+    transaction.on_commit(invalidate_restricted_paths)
+    program_ids = list(Program.objects.descendant_of(instance.page, inclusive=True).values_list('pk', flat=True))
+    if snapshots_enabled():
+        for program_id in program_ids:
+            remove_program_snapshot(program_id)
+    purge_tags_on_commit(*[page_tag(pk) for pk in program_ids])
+
+
+@receiver(post_delete, sender=PageViewRestriction)
+def view_restriction_deleted(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_restricted_paths)
+    refresh_snapshots_on_commit(
+        Program.objects.live().descendant_of(instance.page, inclusive=True).values_list('pk', flat=True)
+    )
+
+
+def taxonomy_changed(sender, instance, created, **kwargs):
+    invalidate_program_facet_index()
+    purge_tags_on_commit(taxonomy_tag(sender))
+    if created:
+        return
+    # The essential info snapshot (and a static page) spell out option names.
+    tagged = Q()
+    for field in Program._meta.many_to_many:
+        if field.related_model is sender:
+            tagged |= Q(**{field.name: instance})
+    program_ids = set(Program.objects.live().filter(tagged).values_list('pk', flat=True)) if tagged else set()
+    if program_ids:
+        ProgramSearchDocument.rebuild(Program.objects.filter(pk__in=program_ids))
+        refresh_snapshots_on_commit(program_ids)
+        purge_tags_on_commit(*[page_tag(pk) for pk in program_ids])
+
+
+def taxonomy_deleted(sender, instance, **kwargs):
+    program_ids = set()
+    for facet in PROGRAM_FACET_FIELDS:
+        if Program._meta.get_field(facet).related_model is sender:
+            program_ids.update(
+                ProgramSearchDocument.objects.filter(**{f'{facet}__contains': [instance.slug]})
+                .values_list('pk', flat=True)
+            )
+            ProgramSearchDocument.remove_option(facet, instance.slug)
+    invalidate_program_facet_index()
+    purge_tags_on_commit(taxonomy_tag(sender), *[page_tag(pk) for pk in program_ids])
+    if program_ids:
+        ProgramSearchDocument.rebuild(Program.objects.filter(pk__in=program_ids))
+        refresh_snapshots_on_commit(program_ids)
+
+
+for model in apps.get_app_config('home').get_models():
+    if issubclass(model, AbstractBaseFilterModel):
+        post_save.connect(taxonomy_changed, sender=model, dispatch_uid=f'taxonomy_saved_{model.__name__}')
+        post_delete.connect(taxonomy_deleted, sender=model, dispatch_uid=f'taxonomy_deleted_{model.__name__}')
+
+
+@receiver(post_save, sender=get_image_model())
+def image_saved(sender, instance, created, update_fields=None, **kwargs):
+    # File replacements are full saves; metadata-only updates (e.g. file_hash
+    # / focal point) pass update_fields. A new upload isn't used anywhere yet,
+    # its renditions are queued when a template first asks for them.
+    if not created and update_fields is None:
+        transaction.on_commit(lambda: schedule_renditions(instance, used_rendition_specs(instance)))
+        purge_tags_on_commit(image_tag(instance.pk))
+
+
+@receiver(post_delete, sender=get_image_model())
+def image_deleted(sender, instance, **kwargs):
+    purge_tags_on_commit(image_tag(instance.pk))
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+def resource_changed(sender, instance, **kwargs):
+    purge_tags_on_commit(model_tag(Resource))
@@ -0,0 +1,223 @@
+"""
+Publish-time static HTML snapshots of Program detail pages.
+
+With ``PROGRAM_SNAPSHOTS = True`` every publish renders the page once and
+writes the HTML under ``PROGRAM_SNAPSHOT_ROOT``, content addressed and
+pre-compressed, and ProgramSnapshotMiddleware serves it to anonymous GETs
+without reaching Wagtail's ``serve``. The layout is::
+
+    objects/ab/<sha256>.html(.gz|.br)   the rendered page
+    routes/<md5 of host + path>.json    {"page": id, "path": tree path, "hash": sha256}
+    pages/<id>.json                     {"route": key, "hash": sha256}
+
+The per-page manifest is what lets a move, an unpublish or a re-render drop
+the route it used to own. Brotli copies are only written when the
+``brotli`` package is installed.
+
+Pages behind a view restriction (password, login or group) are never
+written, and a route is not served once a restriction covers its page: the
+tree paths of restricted pages are kept in the cache and dropped whenever a
+PageViewRestriction changes (see ``home.signals``).
+
+Snapshots include the site header and footer, so a menu change re-renders
+all of them on the ``warming`` task queue
+(``home.tasks.refresh_all_program_snapshots``).
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIRequest
+from wagtail.models import PageViewRestriction
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always written
+    brotli = None
+
+RESTRICTED_PATHS_KEY = 'snapshot_restricted_paths'
+
+
+def snapshots_enabled():
+    return getattr(settings, 'PROGRAM_SNAPSHOTS', False)
+
+
+def snapshot_root():
+    return settings.PROGRAM_SNAPSHOT_ROOT
+
+
+def route_key(host, path):
+    return hashlib.md5(f'{host}{path}'.encode()).hexdigest()
+
+
+def object_path(content_hash, suffix=''):
+    return os.path.join(snapshot_root(), 'objects', content_hash[:2], f'{content_hash}.html{suffix}')
+
+
+def _route_path(key):
+    return os.path.join(snapshot_root(), 'routes', f'{key}.json')
+
+
+def _page_path(page_id):
+    return os.path.join(snapshot_root(), 'pages', f'{page_id}.json')
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(handle, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _read_json(path):
+    try:
+        with open(path, 'rb') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def restricted_paths():
+    """
+    Tree paths of the pages with a view restriction; it covers their subtree.
+    """
+    paths = cache.get(RESTRICTED_PATHS_KEY)
+    if paths is None:
+        paths = tuple(PageViewRestriction.objects.values_list('page__path', flat=True))
+        cache.set(RESTRICTED_PATHS_KEY, paths, None)
+    return paths
+
+
+def invalidate_restricted_paths():
+    cache.delete(RESTRICTED_PATHS_KEY)
+
+
+def render_program(program):
+    """
+    ``(host, path, html)`` of the page as an anonymous visitor sees it, or
+    None when it is restricted or doesn't render a 200. ``serve`` skips the
+    ``before_serve_page`` hooks, where Wagtail enforces view restrictions.
+    """
+    if program.get_view_restrictions().exists():
+        return None
+    request = WSGIRequest(program._get_dummy_headers())
+    request.user = AnonymousUser()
+    request.is_preview = False
+    response = program.serve(request)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        return None
+    return request.get_host(), request.path, response.content
+
+
+def write_program_snapshot(program):
+    """
+    Render ``program`` and point its route at the result; returns the hash.
+    """
+    rendered = render_program(program)
+    if rendered is None:
+        remove_program_snapshot(program.pk)
+        return None
+    host, path, html = rendered
+    content_hash = hashlib.sha256(html).hexdigest()
+    if not os.path.exists(object_path(content_hash)):
+        if brotli is not None:
+            _write_atomic(object_path(content_hash, '.br'), brotli.compress(html))
+        _write_atomic(object_path(content_hash, '.gz'), gzip.compress(html, mtime=0))
+        _write_atomic(object_path(content_hash), html)
+
+    key = route_key(host, path)
+    previous = _read_json(_page_path(program.pk))
+    if previous and previous['route'] != key:
+        _remove(_route_path(previous['route']))
+    route = {'page': program.pk, 'path': program.path, 'hash': content_hash}
+    _write_atomic(_route_path(key), json.dumps(route).encode())
+    _write_atomic(_page_path(program.pk), json.dumps({'route': key, 'hash': content_hash}).encode())
+    return content_hash
+
+
+def remove_program_snapshot(program_id):
+    previous = _read_json(_page_path(program_id))
+    if previous:
+        _remove(_route_path(previous['route']))
+    _remove(_page_path(program_id))
+
+
+def refresh_program_snapshots(program_ids):
+    """
+    Re-render the live programs among ``program_ids`` and drop the rest.
+    """
+    from home.models import Program
+
+    program_ids = set(program_ids)
+    live = Program.objects.live().filter(pk__in=program_ids)
+    for program in live:
+        write_program_snapshot(program)
+        program_ids.discard(program.pk)
+    for program_id in program_ids:
+        remove_program_snapshot(program_id)
+
+
+def snapshot_for(host, path):
+    """
+    Content hash of the snapshot for a request, if there is one and its page
+    has not been restricted since it was written.
+    """
+    route = _read_json(_route_path(route_key(host, path)))
+    if not route or 'path' not in route:
+        return None
+    if route['path'].startswith(restricted_paths()):
+        return None
+    return route['hash']
+
+
+def prune_objects(keep):
+    """
+    Delete stored pages whose hash isn't in ``keep``; returns how many went.
+    """
+    removed = 0
+    objects_dir = os.path.join(snapshot_root(), 'objects')
+    for directory, _, filenames in os.walk(objects_dir):
+        for filename in filenames:
+            if not filename.startswith('.') and filename.split('.', 1)[0] not in keep:
+                _remove(os.path.join(directory, filename))
+                removed += filename.endswith('.html')
+    return removed
+
+
+def _manifests():
+    pages_dir = os.path.join(snapshot_root(), 'pages')
+    if not os.path.isdir(pages_dir):
+        return {}
+    manifests = {}
+    for filename in os.listdir(pages_dir):
+        manifest = _read_json(os.path.join(pages_dir, filename))
+        if manifest:
+            manifests[int(filename.split('.', 1)[0])] = manifest
+    return manifests
+
+
+def snapshot_page_ids():
+    return set(_manifests())
+
+
+def live_hashes():
+    return {manifest['hash'] for manifest in _manifests().values()}
@@ -0,0 +1,67 @@
+from django_tasks import task
+from wagtail.images import get_image_model
+from wagtail.images.models import SourceImageIOError
+
+
+@task(backend='renditions')
+def generate_renditions(image_id, filter_specs):
+    """
+    Create the renditions for ``filter_specs`` that don't exist yet.
+    """
+    image = get_image_model().objects.filter(pk=image_id).first()
+    if image is None:
+        return
+    try:
+        renditions = image.get_renditions(*filter_specs)
+    except SourceImageIOError:
+        return
+
+    from home.cache_tags import image_tag, page_tag, purge_tags
+    from home.models import ProgramSearchDocument
+    from home.renditions import PROGRAM_LOGO_SPEC, picture_data, picture_specs
+
+    # Cached pages rendered while these were pending point at the original.
+    purged_tags = [image_tag(image.pk)]
+
+    # So do listing documents written while these were pending point at the original.
+    if set(renditions) & set(picture_specs(PROGRAM_LOGO_SPEC)):
+        documents = ProgramSearchDocument.objects.filter(program__logo_image=image)
+        program_ids = list(documents.values_list('pk', flat=True))
+        if program_ids:
+            logo_picture = picture_data(image, PROGRAM_LOGO_SPEC)
+            documents.update(logo_url=logo_picture['src'], logo_picture=logo_picture)
+            # and the program pages and listings built from them.
+            purged_tags += [page_tag(pk) for pk in program_ids]
+
+            from home.snapshots import refresh_program_snapshots, snapshots_enabled
+
+            if snapshots_enabled():
+                refresh_program_snapshots(program_ids)
+
+    purge_tags(*purged_tags)
+
+
+@task(backend='warming')
+def warm_pages(page_ids):
+    """
+    Replace the cached responses of just-published pages with fresh renders.
+    """
+    from wagtail.models import Page
+    from home.warming import page_url, purge_url, warm_urls
+
+    urls = [url for url in (page_url(page) for page in Page.objects.live().filter(pk__in=page_ids)) if url]
+    for url in urls:
+        purge_url(url)
+    warm_urls(urls, workers=1)
+
+
+@task(backend='warming')
+def refresh_all_program_snapshots():
+    """
+    Re-render every live program's snapshot; they all carry the site menu.
+    """
+    from home.models import Program
+    from home.snapshots import refresh_program_snapshots, snapshots_enabled
+
+    if snapshots_enabled():
+        refresh_program_snapshots(Program.objects.live().values_list('pk', flat=True))
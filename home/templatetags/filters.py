@@ -155,3 +155,35 @@ def replace(value, arg):
 
     what, to = arg.split('|')
     return value.replace(what, to)
+
+
+@register.simple_tag
+def rendition_or_original(image, filter_spec):
+    """
+    {% rendition_or_original page.logo_image "width-400" as logo_img %}
+    Like {% image ... as %}, but never resizes inside the request: while the
+    rendition is being generated in the background the original is used.
+    """
+    from home.renditions import rendition_or_original as get_rendition_or_original
+
+    if not image:
+        return None
+    return get_rendition_or_original(image, filter_spec)
+
+
+@register.inclusion_tag('home/blocks/picture.html')
+def picture(image, filter_spec, alt='', sizes='', loading='lazy', **attrs):
+    """
+    {% picture rec.image "width-150|height-200" alt=rec.name sizes="150px" class="img-fluid" %}
+    Responsive <picture> with AVIF / WebP sources; see home.renditions.picture_data.
+    """
+    from home.renditions import picture_data
+
+    return {
+        'picture': picture_data(image, filter_spec) if image else None,
+        'alt': alt,
+        'sizes': sizes,
+        'loading': loading,
+        'class': attrs.get('class', ''),
+        'style': attrs.get('style', ''),
+    }
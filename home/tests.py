@@ -1,6 +1,47 @@
-from home.models import HomePage
+import csv
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+from urllib.parse import urlsplit
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django_tasks.backends.database.models import DBTaskResult
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from home.cache_backends import ShardedFileCache, TieredCache, _Tier1
+from home.cache_tags import get_tagged, page_tag, purge_epoch, purge_tags, tag_key
+from home import facet_index
+from home.facet_index import FACET_INDEX_VERSION_KEY, get_program_facet_index, invalidate_program_facet_index
+from home.pagination import encode_cursor
+from home.renditions import RESOURCE_IMAGE_SPEC, picture_specs
+from cast.models import Blog, Post
+from home import warming
+from home.context_processors import site_info
+from home.models import (
+    AboutPage,
+    FocusTopic,
+    HomePage,
+    HomePageFeaturedPost,
+    Program,
+    ProgramDelivery,
+    ProgramIndexPage,
+    ProgramSearchDocument,
+    Resource,
+    ResourceCategory,
+    ResourceSearchResultPage,
+)
 
-from wagtail.models import Page, Site
+from wagtail.images.models import Image, Rendition
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page, PageViewRestriction, Site
 from wagtail.test.utils import WagtailPageTestCase
 
 
@@ -40,3 +81,975 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(self.homepage.url)
         self.assertTemplateUsed(response, "home/home_page.html")
+
+
+@override_settings(WAGTAIL_CACHE=False)
+class ProgramIndexPageTests(WagtailPageTestCase):
+    """
+    Tests for program filtering on the ProgramIndexPage.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        Site.objects.create(hostname="testsite", root_page=root_page, is_default_site=True)
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        self.index_page = ProgramIndexPage(title="Programs")
+        homepage.add_child(instance=self.index_page)
+        invalidate_program_facet_index()
+
+        self.robotics = FocusTopic.objects.create(name="Robotics")
+        self.coding = FocusTopic.objects.create(name="Coding")
+        self.online = ProgramDelivery.objects.create(name="Online")
+
+        self.robot_camp = self.add_program("Robot Camp", focus_topics=[self.robotics], program_delivery=[self.online])
+        self.code_club = self.add_program("Code Club", focus_topics=[self.coding])
+        self.makers = self.add_program("Makers", focus_topics=[self.robotics, self.coding])
+
+    def add_program(self, title, **facets):
+        program = Program(title=title, **facets)
+        # The search index is updated from on_commit callbacks.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.index_page.add_child(instance=program)
+            program.save_revision().publish()
+        return program
+
+    def get_results(self, **params):
+        response = self.client.get(self.index_page.url, params)
+        return [program.title for program in response.context["opportunities"].object_list]
+
+    def test_no_filters_lists_all_programs(self):
+        self.assertEqual(self.get_results(), ["Robot Camp", "Code Club", "Makers"])
+
+    def test_options_within_a_facet_are_ored(self):
+        self.assertEqual(
+            self.get_results(focus_topics=["robotics", "coding"]),
+            ["Robot Camp", "Code Club", "Makers"],
+        )
+
+    def test_facets_are_anded(self):
+        self.assertEqual(
+            self.get_results(focus_topics=["robotics"], program_delivery=["online"]),
+            ["Robot Camp"],
+        )
+
+    def test_unpublished_program_is_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.code_club.unpublish()
+        self.assertEqual(self.get_results(focus_topics=["coding"]), ["Makers"])
+
+    def test_index_version_is_bumped_after_commit(self):
+        self.get_results()
+        version = cache.get(FACET_INDEX_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.code_club.unpublish()
+            self.assertEqual(cache.get(FACET_INDEX_VERSION_KEY), version)
+        self.assertNotEqual(cache.get(FACET_INDEX_VERSION_KEY), version)
+
+    def test_update_swaps_in_a_patched_copy(self):
+        self.get_results()
+        index = get_program_facet_index()
+        live = index.live
+        with self.captureOnCommitCallbacks(execute=True):
+            self.code_club.unpublish()
+        self.assertEqual(index.live, live)
+        self.assertIsNot(get_program_facet_index(), index)
+        self.assertEqual(self.get_results(focus_topics=["coding"]), ["Makers"])
+
+    def test_update_after_another_process_bumped_rebuilds(self):
+        self.get_results()
+        # Another process published in between; its change isn't in our copy.
+        facet_index._bump_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.code_club.unpublish()
+        self.assertIsNone(facet_index._index)
+        self.assertEqual(self.get_results(focus_topics=["coding"]), ["Makers"])
+
+    def test_evicted_version_restarts_above_any_older_one(self):
+        self.get_results()
+        cache.delete(FACET_INDEX_VERSION_KEY)
+        self.assertGreater(facet_index._bump_version(), 1_000_000)
+
+    def test_taxonomy_change_rebuilds_index(self):
+        self.assertEqual(self.get_results(focus_topics=["coding"]), ["Code Club", "Makers"])
+        self.coding.delete()
+        self.assertEqual(self.get_results(focus_topics=["coding"]), [])
+
+    def test_facet_counts_ignore_own_selection(self):
+        response = self.client.get(self.index_page.url, {"focus_topics": ["coding"], "program_delivery": ["online"]})
+        facet_counts = response.context["facet_counts"]
+        # Topic counts are narrowed by the delivery filter only...
+        self.assertEqual(facet_counts["focus_topics"], {"robotics": 1, "coding": 0})
+        # ...and delivery counts by the topic filter only.
+        self.assertEqual(facet_counts["program_delivery"], {"online": 0})
+        self.assertContains(response, 'id="facet-counts"')
+
+    def test_search_keeps_relevance_order_within_facets(self):
+        self.add_program("Robotics Robotics Lab", focus_topics=[self.robotics])
+        self.assertEqual(
+            self.get_results(q="robotics", focus_topics=["robotics"]),
+            ["Robotics Robotics Lab", "Robot Camp"],
+        )
+
+    def test_search_query_count_does_not_grow_with_facets(self):
+        # Warm the facet index so both requests start from the same state.
+        self.get_results()
+        with self.assertNumQueries(9):
+            self.assertEqual(self.get_results(q="camp", focus_topics=["robotics"]), ["Robot Camp"])
+        with self.assertNumQueries(9):
+            self.assertEqual(
+                self.get_results(q="camp", focus_topics=["robotics", "coding"], program_delivery=["online"]),
+                ["Robot Camp"],
+            )
+
+    def test_search_document_follows_publishing(self):
+        document = ProgramSearchDocument.objects.get(pk=self.makers.pk)
+        self.assertEqual(document.focus_topics, ["coding", "robotics"])
+        self.assertEqual(document.url, self.makers.url)
+
+        self.robotics.delete()
+        document.refresh_from_db()
+        self.assertEqual(document.focus_topics, ["coding"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.makers.unpublish()
+        self.assertFalse(ProgramSearchDocument.objects.filter(pk=self.makers.pk).exists())
+
+    def test_search_weights_title_over_provider_over_summary(self):
+        self.add_program("Summary Match", program_summary="Hands-on astronomy nights.")
+        self.add_program("Provider Match", provider="Astronomy Society")
+        self.add_program("Astronomy Club")
+        self.assertEqual(
+            self.get_results(q="astronomy"),
+            ["Astronomy Club", "Provider Match", "Summary Match"],
+        )
+
+    def test_autocomplete_matches_title_and_provider_prefixes(self):
+        cache.clear()
+        self.add_program("Summary Match", program_summary="Robotics league.")
+        self.add_program("Drone Lab", provider="Robothon Inc")
+        response = self.client.get(reverse("program-autocomplete"), {"q": "Rob"})
+        titles = [result["title"] for result in response.json()["results"]]
+        self.assertCountEqual(titles, ["Robot Camp", "Drone Lab"])
+        self.assertEqual(self.client.get(reverse("program-autocomplete"), {"q": "r"}).json()["results"], [])
+
+    def test_json_api_pages_with_keyset_cursors_and_etags(self):
+        url = reverse("program-search-api")
+        response = self.client.get(url, {"focus_topics": "robotics", "limit": 1})
+        data = response.json()
+        self.assertEqual(data["count"], 2)
+        self.assertEqual([item["title"] for item in data["results"]], ["Robot Camp"])
+        self.assertEqual(data["facet_counts"]["focus_topics"]["coding"], 2)
+
+        second = self.client.get(url, {"focus_topics": "robotics", "limit": 1, "after": data["next"]}).json()
+        self.assertEqual([item["title"] for item in second["results"]], ["Makers"])
+        self.assertIsNone(second["next"])
+
+        cached = self.client.get(
+            url, {"focus_topics": "robotics", "limit": 1}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(self.client.get(url, {"limit": "many"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"q": "code"}).json()["count"], 1)
+
+    def test_listing_pages_with_keyset_cursors(self):
+        for number in range(5):
+            self.add_program(f"Extra {number}")
+        response = self.client.get(self.index_page.url)
+        first_page = response.context["opportunities"]
+        self.assertEqual(first_page.count, 8)
+        self.assertFalse(first_page.has_previous())
+
+        second = self.client.get(f"{self.index_page.url}?{first_page.next_querystring()}").context["opportunities"]
+        self.assertEqual(len(second), 3)
+        self.assertFalse(second.has_next())
+
+        back = self.client.get(f"{self.index_page.url}?{second.previous_querystring()}").context["opportunities"]
+        self.assertEqual(back.object_list, first_page.object_list)
+
+    def test_bad_cursors_restart_at_the_first_page(self):
+        first_page = self.client.get(self.index_page.url).context["opportunities"].object_list
+        for values in ([[1]], [self.makers.pk, 1], ["Makers"], [True]):
+            for name in ("after", "before"):
+                response = self.client.get(self.index_page.url, {name: encode_cursor(values)})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context["opportunities"].object_list, first_page)
+
+    def test_search_results_are_cached_by_canonical_signature(self):
+        cache.clear()
+        self.add_program("Robot Lab", focus_topics=[self.coding])
+        filters = {"focus_topics": ["robotics", "coding"]}
+        first, _ = self.index_page.search_programs("Robot", filters)
+        with self.assertNumQueries(0):
+            again, _ = self.index_page.search_programs("  robot ", {"focus_topics": ["coding", "robotics"]})
+        self.assertEqual(again, first)
+
+        self.makers.title = "Robot Makers"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.makers.save_revision().publish()
+        refreshed, _ = self.index_page.search_programs("robot", filters)
+        self.assertEqual(len(refreshed), len(first) + 1)
+
+    def test_active_filter_badges_resolve_names(self):
+        response = self.client.get(self.index_page.url, {"focus_topics": ["robotics", "coding"], "q": "camp"})
+        self.assertEqual(response.context["active_filters"], [
+            ("focus_topics", "robotics", "Robotics", "focus_topics=coding&q=camp"),
+            ("focus_topics", "coding", "Coding", "focus_topics=robotics&q=camp"),
+        ])
+
+        self.coding.name = "Coding & Apps"
+        self.coding.save()
+        response = self.client.get(self.index_page.url, {"focus_topics": ["coding"]})
+        self.assertEqual(response.context["active_filters"], [("focus_topics", "coding", "Coding & Apps", "")])
+
+    def test_filter_sidebar_reads_the_versioned_vocabulary(self):
+        self.client.get(self.index_page.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.index_page.url)
+        self.assertFalse([query for query in queries.captured_queries if '"home_focustopic"' in query["sql"]])
+
+        FocusTopic.objects.create(name="Astronomy")
+        self.assertContains(self.client.get(self.index_page.url), 'value="astronomy"')
+
+    def test_result_cards_are_cached_per_program(self):
+        cache.clear()
+        documents = ProgramSearchDocument.objects.in_bulk([self.code_club.pk, self.makers.pk])
+        code_club_key = documents[self.code_club.pk].card_cache_key()
+        makers_key = documents[self.makers.pk].card_cache_key()
+        self.get_results()
+        self.assertIn("Code Club", cache.get(code_club_key))
+
+        cache.set(makers_key, "<div>cached makers card</div>")
+        response = self.client.get(self.index_page.url)
+        self.assertContains(response, "cached makers card")
+
+        # Republishing replaces only that program's card.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.makers.save_revision().publish()
+        document = ProgramSearchDocument.objects.get(pk=self.makers.pk)
+        self.assertNotEqual(document.card_cache_key(), makers_key)
+        self.assertEqual(ProgramSearchDocument.objects.get(pk=self.code_club.pk).card_cache_key(), code_club_key)
+        response = self.client.get(self.index_page.url)
+        self.assertNotContains(response, "cached makers card")
+        self.assertContains(response, "Makers")
+
+    def test_card_cache_key_follows_the_card_templates(self):
+        document = ProgramSearchDocument.objects.get(pk=self.makers.pk)
+        key = document.card_cache_key()
+        with mock.patch("home.opportunity_model.program_card_template_version", return_value="changed"):
+            self.assertNotEqual(document.card_cache_key(), key)
+
+    def test_detail_page_reads_essential_info_snapshot(self):
+        busy = self.add_program("Busy Program", focus_topics=[self.robotics, self.coding], program_delivery=[self.online])
+        # Warm the site menu so both requests start from the same state.
+        self.client.get(self.index_page.url)
+        with CaptureQueriesContext(connection) as simple:
+            response = self.client.get(self.code_club.url)
+        self.assertEqual(response.context["essential_info"]["Topics"]["value"], "Coding")
+        with CaptureQueriesContext(connection) as busy_queries:
+            response = self.client.get(busy.url)
+        self.assertEqual(response.context["essential_info"]["Topics"]["value"], "Coding, Robotics")
+        self.assertEqual(len(busy_queries), len(simple))
+
+    def test_import_programs_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as sheet:
+            writer = csv.writer(sheet)
+            writer.writerow(["title", "city", "is_exceptional", "application_deadline", "focus_topics", "colour"])
+            writer.writerow(["Rocket Club", "Queens", "yes", "2026-05-01", "Robotics, coding", "red"])
+            writer.writerow(["Code Club", "Bronx", "no", "", "Coding; Astronomy", ""])
+            writer.writerow(["", "Nowhere", "", "", "", ""])
+        self.addCleanup(os.remove, sheet.name)
+
+        out, err = StringIO(), StringIO()
+        call_command("import_programs", sheet.name, separator=",", stdout=out, stderr=err)
+        self.assertIn("2 programs imported, 1 rows skipped", out.getvalue())
+        self.assertIn("Unknown focus_topics values ignored: Coding; Astronomy", err.getvalue())
+
+        rocket = Program.objects.get(title="Rocket Club")
+        self.assertTrue(rocket.live and rocket.is_exceptional)
+        self.assertEqual(rocket.live_revision, rocket.latest_revision)
+        self.assertEqual(rocket.latest_revision.as_object().city, "Queens")
+        self.assertTrue(ProgramSearchDocument.objects.filter(pk=rocket.pk).exists())
+        self.assertEqual(rocket.get_parent().pk, self.index_page.pk)
+        self.assertEqual(set(rocket.focus_topics.values_list("slug", flat=True)), {"robotics", "coding"})
+        self.assertEqual(Program.objects.get(title="Code Club", slug="code-club-2").city, "Bronx")
+        self.assertEqual(Page.find_problems(), ([], [], [], [], []))
+        self.assertEqual(self.get_results(focus_topics="robotics"), ["Robot Camp", "Makers", "Rocket Club"])
+        self.assertEqual(self.get_results(q="rocket"), ["Rocket Club"])
+
+
+IMMEDIATE_TASKS = {
+    "default": {"BACKEND": "django_tasks.backends.immediate.ImmediateBackend"},
+    "renditions": {"BACKEND": "django_tasks.backends.immediate.ImmediateBackend"},
+    "warming": {"BACKEND": "django_tasks.backends.immediate.ImmediateBackend"},
+}
+
+
+SNAPSHOT_ROOT = tempfile.mkdtemp(prefix="program-snapshots-")
+
+
+@override_settings(WAGTAIL_CACHE=False, PROGRAM_SNAPSHOTS=True, PROGRAM_SNAPSHOT_ROOT=SNAPSHOT_ROOT)
+class ProgramSnapshotTests(WagtailPageTestCase):
+    """
+    Published programs are served from static snapshots.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(shutil.rmtree, SNAPSHOT_ROOT, ignore_errors=True)
+        root_page = Page.get_first_root_node()
+        Site.objects.create(hostname="testsite", root_page=root_page, is_default_site=True)
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        self.index_page = ProgramIndexPage(title="Programs")
+        homepage.add_child(instance=self.index_page)
+        self.robotics = FocusTopic.objects.create(name="Robotics")
+        self.program = Program(title="Robot Camp", focus_topics=[self.robotics])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.index_page.add_child(instance=self.program)
+            self.program.save_revision().publish()
+
+    def test_publish_writes_a_snapshot_that_is_served(self):
+        response = self.client.get(self.program.url, HTTP_HOST="testsite", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["X-Snapshot"], "hit")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        html = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertIn("Robot Camp", html)
+        self.assertIn("Robotics", html)
+
+        etag = response["ETag"]
+        response = self.client.get(self.program.url, HTTP_HOST="testsite", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Requests with a query string go through Wagtail.
+        response = self.client.get(self.program.url, {"preview": 1}, HTTP_HOST="testsite")
+        self.assertFalse(response.has_header("X-Snapshot"))
+
+    def test_taxonomy_rename_and_unpublish_refresh_the_snapshot(self):
+        self.robotics.name = "Robotics & AI"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.robotics.save()
+        response = self.client.get(self.program.url, HTTP_HOST="testsite")
+        self.assertEqual(response["X-Snapshot"], "hit")
+        self.assertIn("Robotics &amp; AI", b"".join(response.streaming_content).decode())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.unpublish()
+        response = self.client.get(self.program.url, HTTP_HOST="testsite")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("X-Snapshot"))
+
+    def test_menu_change_refreshes_the_snapshots(self):
+        about = AboutPage(title="About us", slug="about", show_in_menus=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            Page.get_first_root_node().add_child(instance=about)
+            about.save_revision().publish()
+        self.assertNotIn(about.url, self.snapshot_html())
+
+        task = DBTaskResult.objects.get(task_path__endswith="refresh_all_program_snapshots")
+        task.task.call(*task.args_kwargs["args"], **task.args_kwargs["kwargs"])
+        self.assertIn(f'href="{about.url}"', self.snapshot_html())
+
+    def snapshot_html(self):
+        response = self.client.get(self.program.url, HTTP_HOST="testsite")
+        self.assertEqual(response["X-Snapshot"], "hit")
+        return b"".join(response.streaming_content).decode()
+
+    def test_restricted_programs_are_not_served_from_snapshots(self):
+        self.assertEqual(self.client.get(self.program.url, HTTP_HOST="testsite")["X-Snapshot"], "hit")
+        with self.captureOnCommitCallbacks(execute=True):
+            restriction = PageViewRestriction.objects.create(
+                page=self.index_page, restriction_type=PageViewRestriction.PASSWORD, password="secret"
+            )
+        response = self.client.get(self.program.url, HTTP_HOST="testsite")
+        self.assertFalse(response.has_header("X-Snapshot"))
+        self.assertNotContains(response, "Robotics")
+
+        # Republishing a restricted program doesn't write a new snapshot.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.save_revision().publish()
+        self.assertFalse(self.client.get(self.program.url, HTTP_HOST="testsite").has_header("X-Snapshot"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restriction.delete()
+        self.assertEqual(self.client.get(self.program.url, HTTP_HOST="testsite")["X-Snapshot"], "hit")
+
+
+class CacheWarmingTests(WagtailPageTestCase):
+    """
+    warm_cache and the publish hook leave pages in wagtailcache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root_page = Page.get_first_root_node()
+        Site.objects.create(hostname="testsite", root_page=root_page, is_default_site=True)
+        self.homepage = HomePage(title="Home")
+        root_page.add_child(instance=self.homepage)
+        self.index_page = ProgramIndexPage(title="Programs")
+        self.homepage.add_child(instance=self.index_page)
+        self.program = Program(title="Robot Camp")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.index_page.add_child(instance=self.program)
+            self.program.save_revision().publish()
+
+    def test_warm_cache_command_renders_pages_and_logged_filters(self):
+        cache.clear()
+        index_url = self.index_page.full_url
+        index_path = urlsplit(index_url).path
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as log:
+            for target in [
+                f"{index_path}?focus_topics=coding&program_delivery=online",
+                f"{index_path}?program_delivery=online&focus_topics=coding&after=abc",
+                f"{index_path}?focus_topics=robotics",
+            ]:
+                log.write(f'10.0.0.1 - - [18/Oct/2026:10:00:00 +0000] "GET {target} HTTP/1.1" 200 512\n')
+        self.addCleanup(os.unlink, log.name)
+
+        out = StringIO()
+        call_command("warm_cache", workers=1, access_log=[log.name], top=1, stdout=out)
+        output = out.getvalue()
+        self.assertIn("200 miss", output)
+        self.assertIn(f"{index_url}?focus_topics=coding&program_delivery=online", output)
+        self.assertNotIn("focus_topics=robotics", output)
+        self.assertIn("0 failed", output)
+
+        response = self.client.get(self.program.url, HTTP_HOST="testsite")
+        self.assertEqual(response["X-Wagtail-Cache"], "hit")
+
+    @override_settings(WARM_CACHE_ON_PUBLISH=True)
+    def test_publish_rewarms_the_page(self):
+        self.client.get(self.program.url, HTTP_HOST="testsite")
+        self.program.title = "Robot Camp Deluxe"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.save_revision().publish()
+        # Queued for the warming worker rather than rendered in the publish request.
+        task = DBTaskResult.objects.get(backend_name="warming")
+        task.task.call(*task.args_kwargs["args"], **task.args_kwargs["kwargs"])
+        response = self.client.get(self.program.url, HTTP_HOST="testsite")
+        self.assertEqual(response["X-Wagtail-Cache"], "hit")
+        self.assertContains(response, "Robot Camp Deluxe")
+
+
+@override_settings(WARM_CACHE_ON_PUBLISH=False)
+class CacheTagTests(WagtailPageTestCase):
+    """
+    Publishing purges only the cached entries tagged with what changed.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root_page = Page.get_first_root_node()
+        Site.objects.create(hostname="testsite", root_page=root_page, is_default_site=True)
+        self.homepage = HomePage(title="Home")
+        root_page.add_child(instance=self.homepage)
+        self.index_page = ProgramIndexPage(title="Programs")
+        self.homepage.add_child(instance=self.index_page)
+        self.program = Program(title="Robot Camp")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.index_page.add_child(instance=self.program)
+            self.program.save_revision().publish()
+
+    def get(self, page):
+        return self.client.get(page.url, HTTP_HOST="testsite")
+
+    def test_program_publish_purges_its_page_and_listing_only(self):
+        for page in (self.homepage, self.index_page, self.program):
+            self.assertEqual(self.get(page)["X-Wagtail-Cache"], "miss")
+            self.assertEqual(self.get(page)["X-Wagtail-Cache"], "hit")
+
+        self.program.title = "Robot Camp Deluxe"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.save_revision().publish()
+
+        response = self.get(self.index_page)
+        self.assertEqual(response["X-Wagtail-Cache"], "miss")
+        self.assertContains(response, "Robot Camp Deluxe")
+        self.assertEqual(self.get(self.program)["X-Wagtail-Cache"], "miss")
+        self.assertEqual(self.get(self.homepage)["X-Wagtail-Cache"], "hit")
+
+    def test_taxonomy_edit_purges_the_listing(self):
+        self.assertEqual(self.get(self.index_page)["X-Wagtail-Cache"], "miss")
+        with self.captureOnCommitCallbacks(execute=True):
+            FocusTopic.objects.create(name="Astronomy")
+        response = self.get(self.index_page)
+        self.assertEqual(response["X-Wagtail-Cache"], "miss")
+        self.assertContains(response, "Astronomy")
+
+    def test_import_purges_the_listing_only(self):
+        for page in (self.homepage, self.index_page):
+            self.get(page)
+            self.assertEqual(self.get(page)["X-Wagtail-Cache"], "hit")
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as sheet:
+            csv.writer(sheet).writerows([["title"], ["Rocket Club"]])
+        self.addCleanup(os.remove, sheet.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_programs", sheet.name, stdout=StringIO())
+        response = self.get(self.index_page)
+        self.assertEqual(response["X-Wagtail-Cache"], "miss")
+        self.assertContains(response, "Rocket Club")
+        self.assertEqual(self.get(self.homepage)["X-Wagtail-Cache"], "hit")
+
+    def test_purge_tags_drops_tagged_fragments(self):
+        for key in ("fragment", "other fragment", "unrelated"):
+            cache.set(key, "old")
+        tag_key("fragment", [page_tag(self.program.pk)])
+        tag_key("other fragment", [page_tag(self.program.pk)])
+        tag_key("unrelated", [page_tag(self.index_page.pk)])
+        purge_tags(page_tag(self.program.pk))
+        self.assertIsNone(get_tagged("fragment"))
+        self.assertIsNone(get_tagged("other fragment"))
+        self.assertEqual(get_tagged("unrelated"), "old")
+
+    def test_purge_during_a_render_leaves_it_unstamped(self):
+        since = purge_epoch()
+        cache.set("fragment", "built from old rows")
+        purge_tags(page_tag(self.program.pk))
+        tag_key("fragment", [page_tag(self.program.pk)], since=since)
+        self.assertIsNone(get_tagged("fragment"))
+
+        since = purge_epoch()
+        tag_key("fragment", [page_tag(self.program.pk)], since=since)
+        self.assertEqual(get_tagged("fragment"), "built from old rows")
+
+    def test_retagging_after_a_purge_is_current(self):
+        cache.set("fragment", "new")
+        purge_tags(page_tag(self.program.pk))
+        tag_key("fragment", [page_tag(self.program.pk)])
+        self.assertEqual(get_tagged("fragment"), "new")
+        cache.set("untagged", "unknown")
+        self.assertIsNone(get_tagged("untagged"))
+
+
+@override_settings(WARM_CACHE_ON_PUBLISH=False, STALE_WHILE_REVALIDATE_TTLS={"home.program": (0, 600)})
+class StaleWhileRevalidateTests(WagtailPageTestCase):
+    """
+    Stale pages keep being served while a single refresh re-renders them.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root_page = Page.get_first_root_node()
+        Site.objects.create(hostname="testsite", root_page=root_page, is_default_site=True)
+        self.homepage = HomePage(title="Home")
+        root_page.add_child(instance=self.homepage)
+        index_page = ProgramIndexPage(title="Programs")
+        self.homepage.add_child(instance=index_page)
+        self.program = Program(title="Robot Camp")
+        index_page.add_child(instance=self.program)
+        self.refreshes = []
+        self.addCleanup(setattr, warming, "start_refresh", warming.start_refresh)
+        warming.start_refresh = self.refreshes.append
+
+    def get(self, page):
+        return self.client.get(page.url, HTTP_HOST="testsite")
+
+    def test_stale_page_is_served_while_one_refresh_runs(self):
+        response = self.get(self.program)
+        self.assertEqual(response["X-Wagtail-Cache"], "miss")
+        self.assertIn("stale-while-revalidate=600", response["Cache-Control"])
+
+        Program.objects.filter(pk=self.program.pk).update(title="Robot Camp Deluxe")
+        for _ in range(3):
+            response = self.get(self.program)
+            self.assertEqual(response["X-Wagtail-Cache"], "hit")
+            self.assertNotContains(response, "Robot Camp Deluxe")
+        self.assertEqual(len(self.refreshes), 1)
+
+        self.assertEqual(warming.refresh_url(self.refreshes[0]).cache, "miss")
+        self.assertContains(self.get(self.program), "Robot Camp Deluxe")
+        self.assertEqual(len(self.refreshes), 2)
+
+    @override_settings(STALE_WHILE_REVALIDATE_TTLS={"home.program": (100, 700)})
+    def test_hits_count_down_to_the_hard_expiry(self):
+        response = self.get(self.program)
+        self.assertEqual(response["X-Wagtail-Cache"], "miss")
+        self.assertIn("max-age=100", response["Cache-Control"])
+        self.assertIn("stale-while-revalidate=600", response["Cache-Control"])
+
+        started = time.time()
+        with mock.patch("home.middleware.time") as clock:
+            clock.time.return_value = started + 40
+            response = self.get(self.program)
+            self.assertEqual(response["X-Wagtail-Cache"], "hit")
+            self.assertIn("max-age=60", response["Cache-Control"])
+            self.assertIn("stale-while-revalidate=600", response["Cache-Control"])
+
+            clock.time.return_value = started + 300
+            response = self.get(self.program)
+            self.assertIn("max-age=0", response["Cache-Control"])
+            self.assertIn("stale-while-revalidate=400", response["Cache-Control"])
+
+    def test_other_page_types_are_not_revalidated(self):
+        self.get(self.homepage)
+        self.assertEqual(self.get(self.homepage)["X-Wagtail-Cache"], "hit")
+        self.assertEqual(self.refreshes, [])
+
+    def test_refresh_header_needs_the_token(self):
+        self.get(self.program)
+        response = self.client.get(self.program.url, HTTP_HOST="testsite", HTTP_X_CACHE_REFRESH="guess")
+        self.assertEqual(response["X-Wagtail-Cache"], "hit")
+
+
+@override_settings(WAGTAIL_CACHE=False)
+class FeaturedPostListTests(WagtailPageTestCase):
+    """
+    HomePage.featured_post_list caches post ids, not posts.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root_page = Page.get_first_root_node()
+        self.homepage = HomePage(title="Home")
+        root_page.add_child(instance=self.homepage)
+        blog = Blog(title="Insights", slug="insights")
+        self.homepage.add_child(instance=blog)
+        self.posts = []
+        for title in ("First", "Second", "Third"):
+            post = Post(title=title)
+            blog.add_child(instance=post)
+            self.posts.append(post)
+        self.feature(self.posts[2], self.posts[0])
+
+    def feature(self, *posts):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.homepage.featured_posts.all().delete()
+            for order, post in enumerate(posts):
+                HomePageFeaturedPost.objects.create(page=self.homepage, post=post, sort_order=order)
+
+    def featured_titles(self):
+        return [post.title for post in HomePage.objects.get(pk=self.homepage.pk).featured_post_list]
+
+    def test_caches_ordered_ids_and_hydrates_in_bulk(self):
+        self.assertEqual(self.featured_titles(), ["Third", "First"])
+        cached = cache.get(self.homepage.featured_posts_cache_key())
+        self.assertEqual(cached, [self.posts[2].pk, self.posts[0].pk])
+
+        homepage = HomePage.objects.get(pk=self.homepage.pk)
+        with CaptureQueriesContext(connection) as queries:
+            homepage.featured_post_list
+        # The posts, their cover images and the renditions; no featured rows.
+        self.assertLessEqual(len(queries), 3)
+
+    def test_featured_and_post_changes_show_up(self):
+        self.assertEqual(self.featured_titles(), ["Third", "First"])
+        self.feature(self.posts[1])
+        self.assertEqual(self.featured_titles(), ["Second"])
+
+        self.posts[1].title = "Second, revised"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[1].save_revision().publish()
+        self.assertEqual(self.featured_titles(), ["Second, revised"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[1].unpublish()
+        self.assertEqual(self.featured_titles(), [])
+
+
+class SiteInfoTests(WagtailPageTestCase):
+    """
+    The site menu is cached per host and version and skipped in the admin.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.homepage = HomePage(title="Home")
+        Page.get_first_root_node().add_child(instance=self.homepage)
+        Site.objects.create(hostname="testsite", root_page=self.homepage, is_default_site=True)
+        self.index_page = ProgramIndexPage(title="Programs", slug="programs", show_in_menus=True)
+        self.homepage.add_child(instance=self.index_page)
+        self.factory = RequestFactory(HTTP_HOST="testsite")
+
+    def test_warm_hit_runs_no_queries(self):
+        first = site_info(self.factory.get("/"))
+        self.assertEqual(first["site_pages"]["programs"].url, "/programs/")
+        with self.assertNumQueries(0):
+            self.assertEqual(site_info(self.factory.get("/about/")), first)
+
+    def test_menu_changes_bump_the_version(self):
+        site_info(self.factory.get("/"))
+        about = AboutPage(title="About", slug="about", show_in_menus=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.homepage.add_child(instance=about)
+            about.save_revision().publish()
+        self.assertEqual(site_info(self.factory.get("/"))["site_pages"]["about"].title, "About")
+
+    def test_skipped_for_admin_and_ajax(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(site_info(self.factory.get(reverse("wagtailadmin_home"))), {})
+            self.assertEqual(site_info(self.factory.get("/", HTTP_X_REQUESTED_WITH="XMLHttpRequest")), {})
+
+
+@override_settings(WAGTAIL_CACHE=False, TASKS=IMMEDIATE_TASKS)
+class ResourceSearchResultPageTests(WagtailPageTestCase):
+    """
+    Tests for keyset pagination on the resource listing.
+    """
+
+    def setUp(self):
+        cache.clear()
+        root_page = Page.get_first_root_node()
+        Site.objects.create(hostname="testsite", root_page=root_page, is_default_site=True)
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        self.results_page = ResourceSearchResultPage(title="Resources")
+        homepage.add_child(instance=self.results_page)
+
+        self.books = ResourceCategory.objects.create(name="Books")
+        for number in range(12):
+            resource = Resource.objects.create(name=f"Resource {number:02d}")
+            if number % 2:
+                resource.types.add(self.books)
+                resource.save()
+
+    def get_page(self, query=""):
+        response = self.client.get(f"{self.results_page.url}?{query}", HTTP_HOST="testsite")
+        return response.context["resources"]
+
+    def test_pages_follow_name_order(self):
+        first = self.get_page()
+        self.assertEqual(first.count, 12)
+        self.assertEqual(first.object_list[0].name, "Resource 00")
+        second = self.get_page(first.next_querystring())
+        self.assertEqual([r.name for r in second.object_list], ["Resource 10", "Resource 11"])
+        self.assertEqual(self.get_page(second.previous_querystring()).object_list, first.object_list)
+
+    def test_bad_cursors_restart_at_the_first_page(self):
+        first = self.get_page().object_list
+        # A program cursor, a nested list and values of the wrong type.
+        for values in ([5], [[1]], ["Resource 03", [1]], ["Resource 03", "x"], [None, 1]):
+            for name in ("after", "before"):
+                self.assertEqual(self.get_page(f"{name}={encode_cursor(values)}").object_list, first)
+
+    def test_filtered_pages_have_no_duplicates(self):
+        page = self.get_page("cat=books")
+        self.assertEqual(page.count, 6)
+        self.assertFalse(page.has_other_pages())
+
+    def test_image_queries_do_not_grow_with_the_page(self):
+        resources = list(Resource.objects.order_by("name"))
+        resources[0].image = Image.objects.create(title="first", file=get_test_image_file())
+        resources[0].save()
+        # Warm up: the first render queues the renditions (run on commit).
+        with self.captureOnCommitCallbacks(execute=True):
+            self.get_page()
+        with CaptureQueriesContext(connection) as one_image:
+            self.get_page()
+
+        for number, resource in enumerate(resources[1:10]):
+            resource.image = Image.objects.create(title=f"image {number}", file=get_test_image_file())
+            resource.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.get_page()
+        self.assertEqual(Rendition.objects.filter(filter_spec="width-150|height-200").count(), 10)
+        with CaptureQueriesContext(connection) as ten_images:
+            self.get_page()
+        self.assertEqual(len(ten_images), len(one_image))
+
+
+@override_settings(WAGTAIL_CACHE=False)
+class BackgroundRenditionTests(WagtailPageTestCase):
+    """
+    Renditions are generated by the "renditions" task queue, not in requests.
+    """
+
+    def test_templates_queue_renditions_and_fall_back(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = Image.objects.create(title="logo", file=get_test_image_file())
+        # Not used anywhere yet, so nothing is generated up front.
+        self.assertFalse(DBTaskResult.objects.exists())
+
+        pending = Template("{% load filters %}{% rendition_or_original image 'width-400' as img %}{{ img.url }}")
+        self.assertEqual(pending.render(Context({"image": image})), image.file.url)
+        self.assertFalse(image.renditions.exists())
+        task = DBTaskResult.objects.get()
+        self.assertEqual(task.args_kwargs["args"], [image.pk, ["width-400"]])
+        # Already queued, so rendering again doesn't add a second job.
+        pending.render(Context({"image": image}))
+        self.assertEqual(DBTaskResult.objects.count(), 1)
+
+        task.task.call(*task.args_kwargs["args"], **task.args_kwargs["kwargs"])
+        image = Image.objects.get(pk=image.pk)
+        self.assertEqual(
+            pending.render(Context({"image": image})),
+            image.get_rendition("width-400").url,
+        )
+
+    def test_replaced_file_queues_only_the_renditions_in_use(self):
+        image = Image.objects.create(title="cover", file=get_test_image_file())
+        Resource.objects.create(name="Guide", image=image)
+        image.file = get_test_image_file(filename="replaced.png")
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+        task = DBTaskResult.objects.get()
+        self.assertEqual(task.args_kwargs["args"][1], sorted(picture_specs(RESOURCE_IMAGE_SPEC)))
+
+    def test_picture_tag_serves_modern_formats_once_generated(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = Image.objects.create(title="logo", file=get_test_image_file(size=(800, 600)))
+        template = Template('{% load filters %}{% picture image "width-400" alt="Logo" sizes="400px" %}')
+
+        pending = template.render(Context({"image": image}))
+        self.assertIn(f'src="{image.file.url}"', pending)
+        self.assertIn('width="800" height="600"', pending)
+        self.assertNotIn("<source", pending)
+
+        task = DBTaskResult.objects.get()
+        task.task.call(*task.args_kwargs["args"], **task.args_kwargs["kwargs"])
+        html = template.render(Context({"image": Image.objects.get(pk=image.pk)}))
+        self.assertIn('<source type="image/avif"', html)
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn(" 200w, ", html)
+        self.assertIn(" 800w", html)
+        self.assertIn('width="400" height="300"', html)
+
+
+TIERED_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tiered-tests"},
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    """
+    Two TieredCache instances with their own tier 1 stand in for two worker processes.
+    """
+
+    def setUp(self):
+        caches["shared"].clear()
+        params = {"OPTIONS": {"L1_MAX_ENTRIES": 3, "SYNC_INTERVAL": 0}}
+        self.worker_a = TieredCache("shared", params)
+        self.worker_b = TieredCache("shared", params)
+        self.worker_a._tier1, self.worker_b._tier1 = _Tier1(), _Tier1()
+
+    def test_reads_are_served_from_tier_one(self):
+        self.worker_a.set("nav", {"about": "/about/"})
+        self.assertEqual(self.worker_b.get("nav"), {"about": "/about/"})
+        self.assertEqual(self.worker_b.get("nav"), {"about": "/about/"})
+        stats = self.worker_b.stats()
+        self.assertEqual((stats["l1_hits"], stats["l2_hits"]), (1, 1))
+        self.assertIsNone(self.worker_b.get("missing"))
+        self.assertEqual(self.worker_b.stats()["l2_misses"], 1)
+
+    def test_writes_elsewhere_invalidate_tier_one(self):
+        self.worker_a.set("nav", "v1")
+        self.worker_b.get("nav")
+        self.worker_a.set("nav", "v2")
+        self.assertEqual(self.worker_b.get("nav"), "v2")
+        self.worker_a.delete("nav")
+        self.assertIsNone(self.worker_b.get("nav"))
+
+    def test_tier_one_never_outlives_the_shared_entry(self):
+        directory = tempfile.mkdtemp(prefix="tiered-files-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        file_caches = {
+            **TIERED_CACHES,
+            "files": {"BACKEND": "home.cache_backends.ShardedFileCache", "LOCATION": directory,
+                      "OPTIONS": {"CULL_INTERVAL": 0}},
+        }
+        with override_settings(CACHES=file_caches):
+            worker = TieredCache("files", {"OPTIONS": {"L1_TIMEOUT": 30, "SYNC_INTERVAL": 0}})
+            worker._tier1 = _Tier1()
+            caches["files"].set("short", "v", timeout=2)
+            self.assertEqual(worker.get("short"), "v")
+            expires_at, _ = worker._tier1.entries[worker.make_and_validate_key("short")]
+            self.assertLessEqual(expires_at - time.monotonic(), 2)
+
+    def test_tier_one_is_bounded(self):
+        for key in "abcd":
+            self.worker_a.set(key, key)
+        self.assertEqual(self.worker_a.stats()["l1_entries"], 3)
+        self.assertEqual(self.worker_a.get_many(["a", "d"]), {"a": "a", "d": "d"})
+
+
+class ShardedFileCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="sharded-cache-")
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.cache = ShardedFileCache(self.directory, {"OPTIONS": {"MAX_ENTRIES": 3, "CULL_INTERVAL": 0}})
+
+    def test_entries_live_in_hashed_sub_directories(self):
+        self.cache.set("program_card:1:abc", "<div>card</div>")
+        path = self.cache._key_to_file("program_card:1:abc")
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(os.path.relpath(path, self.directory).count(os.sep), 3)
+        self.assertEqual(self.cache.get("program_card:1:abc"), "<div>card</div>")
+        # Nothing but the entry itself: the temp file was renamed into place.
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+
+    def test_delete_prefix_drops_one_namespace(self):
+        self.cache.set("program_card:1", "one")
+        self.cache.set("program_card:2", "two")
+        self.cache.set("site_pages:3", "nav")
+        self.assertTrue(self.cache.delete_prefix("program_card:"))
+        self.assertIsNone(self.cache.get("program_card:1"))
+        self.assertIsNone(self.cache.get("program_card:2"))
+        self.assertEqual(self.cache.get("site_pages:3"), "nav")
+        self.cache.set("program_card:1", "again")
+        self.assertEqual(self.cache.get("program_card:1"), "again")
+
+    def test_incr_is_atomic_and_keeps_the_expiry(self):
+        self.cache.set("counter:hits", 0, timeout=100)
+        _, expires_at = self.cache.get_with_expiry("counter:hits")
+
+        def bump():
+            for _ in range(50):
+                self.cache.incr("counter:hits")
+
+        threads = [threading.Thread(target=bump) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get_with_expiry("counter:hits"), (200, expires_at))
+        with self.assertRaises(ValueError):
+            self.cache.incr("counter:missing")
+
+    def test_cull_never_trims_kept_namespaces(self):
+        sharded = ShardedFileCache(
+            self.directory, {"OPTIONS": {"MAX_ENTRIES": 3, "CULL_INTERVAL": 0, "KEEP_NAMESPACES": ["version"]}}
+        )
+        sharded.set("version:facet_index", 7)
+        sharded.set("version:expired", 1, timeout=-1)
+        for i in range(5):
+            sharded.set(f"key:{i}", i)
+        self.assertEqual(sharded.cull(), 4)
+        self.assertEqual(sharded.get("version:facet_index"), 7)
+        self.assertEqual(len(sharded._list_cache_files()), 4)
+
+    def test_add_has_one_winner_and_replaces_expired_entries(self):
+        results = []
+
+        def take_lock(worker):
+            results.append(self.cache.add("swr_refresh:page", worker, timeout=60))
+
+        threads = [threading.Thread(target=take_lock, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 1)
+        self.assertIn(self.cache.get("swr_refresh:page"), range(8))
+
+        self.cache.set("swr_refresh:expired", "old", timeout=-1)
+        self.assertTrue(self.cache.add("swr_refresh:expired", "new"))
+        self.assertFalse(self.cache.add("swr_refresh:expired", "newer"))
+        self.assertEqual(self.cache.get("swr_refresh:expired"), "new")
+        path = self.cache._key_to_file("swr_refresh:expired")
+        self.assertFalse([name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")])
+
+    def test_cull_expires_and_trims_off_the_request_path(self):
+        for i in range(5):
+            self.cache.set(f"key:{i}", i)
+        self.cache.set("key:expired", "old", timeout=-1)
+        self.assertEqual(len(self.cache._list_cache_files()), 6)
+        self.assertEqual(self.cache.cull(), 3)
+        self.assertEqual(len(self.cache._list_cache_files()), 3)
+        self.cache.clear()
+        self.assertEqual(self.cache._list_cache_files(), [])
+        self.cache.cull()
+        self.assertEqual(os.listdir(os.path.join(self.directory, "_trash")), [])
+
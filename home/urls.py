@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     # Example URL: /opportunities/search/
+    path('api/v1/programs/', views.program_search_api, name='program-search-api'),
+    path('autocomplete/', views.program_autocomplete, name='program-autocomplete'),
 ]
\ No newline at end of file
@@ -3,14 +3,120 @@ from django.views.generic.base import TemplateView
 from django.contrib import messages
 from django.shortcuts import render
 from django.conf import settings
-from home.opportunity_model import ProgramIndexPage
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from wagtailcache.cache import nocache_page
+from home.opportunity_model import ProgramIndexPage, ProgramSearchDocument
+from home.pagination import paginate_ids
 import requests
 import logging
+import hashlib
+import json
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_CACHE_TIMEOUT = 60  # seconds
+
+
+@nocache_page
+def program_autocomplete(request):
+    """
+    Title / provider suggestions for the program search box. Each prefix is
+    cached briefly so fast typists and repeated prefixes skip the database.
+    """
+    prefix = ' '.join(request.GET.get('q', '').lower().split())[:100]
+    if len(prefix) < AUTOCOMPLETE_MIN_LENGTH:
+        return JsonResponse({'query': prefix, 'results': []})
+
+    cache_key = f'program_autocomplete:{prefix}'
+    results = cache.get(cache_key)
+    if results is None:
+        results = ProgramSearchDocument.autocomplete(prefix, limit=AUTOCOMPLETE_LIMIT)
+        cache.set(cache_key, results, AUTOCOMPLETE_CACHE_TIMEOUT)
+
+    response = JsonResponse({'query': prefix, 'results': results})
+    response['Cache-Control'] = f'public, max-age={AUTOCOMPLETE_CACHE_TIMEOUT}'
+    return response
+
+
+PROGRAM_API_VERSION = 1
+PROGRAM_API_PAGE_SIZE = 20
+PROGRAM_API_MAX_PAGE_SIZE = 100
+
+
+def program_api_item(document):
+    return {
+        'id': document.pk,
+        'title': document.title,
+        'url': document.url,
+        'city': document.city,
+        'state': document.state,
+        'summary': document.summary,
+        'logo_url': document.logo_url,
+    }
+
+
+@nocache_page
+def program_search_api(request):
+    """
+    JSON version of the program listing: same ``q`` and facet parameters as
+    ProgramIndexPage, plus ``index`` (page id), ``limit`` and the ``after`` /
+    ``before`` keyset cursors handed out as ``next`` / ``previous``.
+    Responses carry a content ETag so an unchanged result set costs a 304.
+    """
+    index_pages = ProgramIndexPage.objects.live()
+    index_id = request.GET.get('index')
+    if index_id:
+        if not index_id.isdigit():
+            raise Http404
+        index_page = get_object_or_404(index_pages, pk=index_id)
+    else:
+        index_page = index_pages.first()
+        if index_page is None:
+            raise Http404
+
+    try:
+        limit = int(request.GET.get('limit', PROGRAM_API_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit.'}, status=400)
+    limit = min(max(limit, 1), PROGRAM_API_MAX_PAGE_SIZE)
+
+    search_query = request.GET.get('q', '').strip()
+    selected_filters = index_page.selected_filters_for(request.GET)
+    opportunities, facet_counts = index_page.search_programs(search_query, selected_filters)
+
+    page = paginate_ids(opportunities, limit, request.GET)
+    documents = ProgramSearchDocument.objects.in_bulk(page.object_list)
+    payload = {
+        'version': PROGRAM_API_VERSION,
+        'count': page.count,
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+        'results': [program_api_item(documents[pk]) for pk in page.object_list if pk in documents],
+        'facet_counts': facet_counts,
+    }
+
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'), sort_keys=True)
+    etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['Cache-Control'] = 'no-cache'
+        return not_modified
+
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
 def send_mail(subject, message, from_email, recipient_list, fail_silently=True):
     return True
 
@@ -0,0 +1,102 @@
+"""
+Per-process cache of the taxonomy vocabularies: every
+AbstractBaseFilterModel subclass as ``Term(id, slug, name)`` tuples in name
+order, plus a ``{slug: name}`` map for each.
+
+As with the facet index, a version number in the shared cache tells the
+worker processes that their copy is stale. ``AbstractBaseFilterModel.save``
+and ``delete`` bump it once the transaction commits, so every worker picks
+up an edit on its next request and otherwise issues no taxonomy queries.
+"""
+import logging
+import threading
+from collections import namedtuple
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+VOCABULARY_VERSION_KEY = 'version:taxonomy_vocabulary'
+
+Term = namedtuple('Term', ['id', 'slug', 'name'])
+
+
+def vocabulary_models():
+    from home.abstract_model import AbstractBaseFilterModel
+
+    return [model for model in apps.get_models() if issubclass(model, AbstractBaseFilterModel)]
+
+
+def load_vocabulary():
+    terms, names = {}, {}
+    for model in vocabulary_models():
+        label = model._meta.label_lower
+        terms[label] = tuple(Term(*row) for row in model.objects.order_by('name').values_list('pk', 'slug', 'name'))
+        names[label] = {term.slug: term.name for term in terms[label]}
+    return {'terms': terms, 'names': names}
+
+
+_vocabulary = None
+_vocabulary_version = None
+_lock = threading.Lock()
+
+
+def get_vocabulary():
+    """
+    Return this process' vocabulary, reloading it when another process has
+    bumped the shared version.
+    """
+    global _vocabulary, _vocabulary_version
+    version = cache.get(VOCABULARY_VERSION_KEY)
+    vocabulary = _vocabulary
+    if vocabulary is None or version != _vocabulary_version:
+        with _lock:
+            if _vocabulary is None or version != _vocabulary_version:
+                _vocabulary = load_vocabulary()
+                _vocabulary_version = version
+            vocabulary = _vocabulary
+    return vocabulary
+
+
+def terms(model):
+    """
+    ``Term(id, slug, name)`` tuples for ``model``, ordered by name.
+    """
+    return get_vocabulary()['terms'].get(model._meta.label_lower, ())
+
+
+def term_names(model):
+    """
+    ``{slug: name}`` for ``model``.
+    """
+    return get_vocabulary()['names'].get(model._meta.label_lower, {})
+
+
+def _bump_version():
+    try:
+        cache.incr(VOCABULARY_VERSION_KEY)
+    except ValueError:
+        cache.set(VOCABULARY_VERSION_KEY, 1, None)
+
+
+def invalidate_vocabulary():
+    """
+    Drop this process' copy now and tell the others once the edit is
+    committed, so nobody reloads the old rows under the new version.
+    """
+    global _vocabulary
+    with _lock:
+        _vocabulary = None
+    transaction.on_commit(_bump_version)
+
+
+def warm_vocabulary():
+    """
+    Load the vocabulary before the worker takes traffic; see gotham_stem.wsgi.
+    """
+    try:
+        get_vocabulary()
+    except DatabaseError:
+        logger.warning("Taxonomy vocabulary not warmed, the database is unavailable.", exc_info=True)
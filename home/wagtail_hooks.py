@@ -10,6 +10,21 @@ from wagtail.admin.rich_text.converters.html_to_contentstate import (
 ) 
 from wagtail.admin.modal_workflow import render_modal_workflow
 
+from home.cache_tags import page_tags, tag_request
+from home.warming import page_cache_ttls
+
+
+@hooks.register('before_serve_page')
+def tag_served_page(page, request, serve_args, serve_kwargs):
+    # Surrogate keys for the cached response, see home.cache_tags.
+    tag_request(request, *page_tags(page))
+
+
+@hooks.register('before_serve_page')
+def set_cache_ttls(page, request, serve_args, serve_kwargs):
+    # Soft / hard TTLs, see home.middleware.StaleWhileRevalidateFetchMiddleware.
+    request._cache_ttls = page_cache_ttls(page)
+
 # @hooks.register('insert_global_admin_css')
 # def global_admin_css():
 #     return format_html(
@@ -0,0 +1,187 @@
+"""
+Cache warming: request pages through the full middleware stack, as an
+anonymous visitor, so wagtailcache has them stored before anyone waits on
+the render. Used by ``manage.py warm_cache`` after a deploy, by the
+publish hook in home.signals (via home.tasks.warm_pages) and by the
+stale-while-revalidate refreshes of home.middleware.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.http import QueryDict
+from django.test import RequestFactory
+from django.utils.crypto import constant_time_compare, salted_hmac
+from wagtailcache.cache import _get_cache_key
+from wagtailcache.settings import wagtailcache_settings
+
+logger = logging.getLogger(__name__)
+
+WarmResult = namedtuple('WarmResult', ['url', 'status', 'cache', 'seconds'])
+
+# "GET /programs/?focus_topics=coding HTTP/1.1" in common / combined log lines
+LOG_REQUEST = re.compile(r'"GET (?P<target>\S+) HTTP/[\d.]+"')
+# Cursor tokens only matter to the visitor who followed them.
+IGNORED_PARAMS = ('after', 'before', 'page')
+# Marks our own re-render of a stale page, see refresh_url.
+REFRESH_HEADER = 'X-Cache-Refresh'
+
+
+def page_url(page):
+    """
+    Absolute URL of a routable page, or None.
+    """
+    parts = page.get_url_parts()
+    if parts is None:
+        return None
+    _, root_url, page_path = parts
+    return f'{root_url}{page_path}' if root_url else None
+
+
+def _request_kwargs(url):
+    parts = urlsplit(url)
+    return parts.path, QueryDict(parts.query), {
+        'HTTP_HOST': parts.netloc,
+        'secure': parts.scheme == 'https',
+    }
+
+
+@lru_cache(maxsize=None)
+def _handler():
+    # One per process and, like a WSGI server's, shared by its threads.
+    return WSGIHandler()
+
+
+def warm_url(url, headers=None):
+    """
+    GET ``url`` through the middleware stack and time it.
+    """
+    path, query, extra = _request_kwargs(url)
+    # Every request arrives like a first visit, without cookies.
+    request = RequestFactory().get(path, query, headers=headers, **extra)
+    started = time.perf_counter()
+    response = _handler().get_response(request)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    # response.close() would also send request_finished, closing this
+    # thread's database connections; only a streamed file needs closing.
+    if getattr(response, 'file_to_stream', None) is not None:
+        response.file_to_stream.close()
+    seconds = time.perf_counter() - started
+    return WarmResult(url, response.status_code, response.get(wagtailcache_settings.WAGTAIL_CACHE_HEADER, ''), seconds)
+
+
+def _warm_in_thread(url):
+    try:
+        return warm_url(url)
+    finally:
+        connections.close_all()
+
+
+def warm_urls(urls, workers=4):
+    """
+    Warm ``urls`` with at most ``workers`` threads; one worker runs inline.
+    Results come back in the order of ``urls``.
+    """
+    urls = list(urls)
+    if workers <= 1:
+        return [warm_url(url) for url in urls]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_warm_in_thread, urls))
+
+
+def purge_url(url):
+    """
+    Drop the wagtailcache entry an anonymous GET of ``url`` would be served.
+    """
+    if not wagtailcache_settings.WAGTAIL_CACHE:
+        return
+    path, query, extra = _request_kwargs(url)
+    request = RequestFactory().get(path, query, **extra)
+    backend = caches[wagtailcache_settings.WAGTAIL_CACHE_BACKEND]
+    cache_key = _get_cache_key(request, backend)
+    if cache_key:
+        backend.delete(cache_key)
+
+
+def top_listing_urls(log_paths, listing_pages, limit):
+    """
+    The ``limit`` most requested filter combinations of ``listing_pages`` in
+    the access logs, as absolute URLs with their parameters in a canonical
+    order so that reorderings count as one combination.
+    """
+    roots = {}
+    for page in listing_pages:
+        url = page_url(page)
+        if url:
+            roots[urlsplit(url).path] = url
+    counts = Counter()
+    for log_path in log_paths:
+        with open(log_path, encoding='utf-8', errors='replace') as handle:
+            for line in handle:
+                match = LOG_REQUEST.search(line)
+                if not match:
+                    continue
+                target = urlsplit(match['target'])
+                if target.path not in roots or not target.query:
+                    continue
+                params = QueryDict(target.query, mutable=True)
+                for key in IGNORED_PARAMS:
+                    params.pop(key, None)
+                query = urlencode(sorted(
+                    (key, value) for key, values in params.lists() for value in values if value
+                ))
+                if query:
+                    counts[(target.path, query)] += 1
+    return [f'{roots[path]}?{query}' for (path, query), _ in counts.most_common(limit)]
+
+
+def page_cache_ttls(page):
+    """
+    ``(soft, hard)`` seconds for cached responses of ``page``'s type from
+    the ``STALE_WHILE_REVALIDATE_TTLS`` setting, or None when its responses
+    just expire.
+    """
+    ttls = getattr(settings, 'STALE_WHILE_REVALIDATE_TTLS', {})
+    return ttls.get(page._meta.label_lower, ttls.get('default'))
+
+
+def refresh_token():
+    return salted_hmac('home.warming.refresh', 'stale-while-revalidate').hexdigest()
+
+
+def is_refresh_request(request):
+    token = request.headers.get(REFRESH_HEADER)
+    return bool(token) and constant_time_compare(token, refresh_token())
+
+
+def refresh_url(url):
+    """
+    Re-render ``url`` past the stale copy in wagtailcache and store it.
+    """
+    return warm_url(url, headers={REFRESH_HEADER: refresh_token()})
+
+
+def _refresh_in_thread(url):
+    try:
+        refresh_url(url)
+    except Exception:
+        logger.exception("Could not refresh %s.", url)
+    finally:
+        connections.close_all()
+
+
+def start_refresh(url):
+    """
+    Refresh ``url`` on a daemon thread; the caller holds the refresh lock.
+    """
+    threading.Thread(target=_refresh_in_thread, args=(url,), name='cache-refresh', daemon=True).start()